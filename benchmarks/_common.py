@@ -0,0 +1,31 @@
+"""
+Helpers shared by the benchmark scripts. Importing this module puts the
+top-level directory of the repository first on the import path, so the
+scripts measure the pandas_cub_final package next to them.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import pandas_cub_final as pdc  # noqa: E402
+
+DATA = os.path.join(ROOT, 'data', 'employee.csv')
+
+
+def make_rng(seed=0):
+    # every benchmark draws its data from the same seed so runs are comparable
+    return np.random.default_rng(seed)
+
+
+def best_time(func, *args, repeat=3):
+    # the fastest of `repeat` calls of func(*args), in seconds
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
@@ -0,0 +1,36 @@
+"""
+Compares a single ``DataFrame.groupby(...).agg(...)`` call computing
+several statistics against one ``pivot_table`` call per statistic.
+
+Run from the top-level directory of the repository:
+
+    python benchmarks/bench_groupby.py
+"""
+from _common import best_time, make_rng, pdc
+
+AGGS = {'x': ['sum', 'mean', 'std', 'min', 'max'], 'y': ['sum', 'max']}
+
+
+def make_frame(n=2000000):
+    rng = make_rng()
+    return pdc.DataFrame({'key': rng.choice(['north', 'south', 'east', 'west'], n).astype('O'),
+                          'x': rng.normal(size=n),
+                          'y': rng.integers(0, 1000, n)})
+
+
+def repeated_pivot_table(df):
+    return [df.pivot_table(rows='key', values=col, aggfunc=func)
+            for col, funcs in AGGS.items() for func in funcs]
+
+
+def groupby_agg(df):
+    return df.groupby('key').agg(AGGS)
+
+
+
+if __name__ == '__main__':
+    df = make_frame()
+    n_aggs = sum(len(funcs) for funcs in AGGS.values())
+    for label, func in [(f'{n_aggs} x pivot_table', repeated_pivot_table),
+                        ('groupby().agg()', groupby_agg)]:
+        print(f'{label:>18}: {best_time(func, df):.3f} s')
@@ -0,0 +1,51 @@
+"""
+Measures DataFrame.merge on 1M x 1M rows. Low cardinality joins a fact
+table whose keys repeat (1000 distinct values) to a table of 1M rows.
+High cardinality joins two tables whose keys are mostly distinct. Both
+join algorithms are timed, with the key columns shuffled and sorted.
+A row-by-row dict lookup, the way tables were combined before merge
+existed, is timed for comparison.
+
+Run from the top-level directory of the repository:
+
+    python benchmarks/bench_merge.py
+"""
+import numpy as np
+
+from _common import best_time, make_rng, pdc
+
+
+def make_frames(n_rows=1000000, n_keys=1000, sort=False):
+    rng = make_rng()
+    left_keys = rng.integers(0, n_keys, n_rows)
+    right_keys = rng.permutation(n_rows) if n_keys < n_rows else rng.integers(0, n_keys, n_rows)
+    if sort:
+        left_keys, right_keys = np.sort(left_keys), np.sort(right_keys)
+    left = pdc.DataFrame({'key': left_keys, 'a': rng.random(n_rows)})
+    right = pdc.DataFrame({'key': right_keys, 'b': rng.random(n_rows)})
+    return left, right
+
+
+def dict_lookup(left, right):
+    lookup = dict(zip(right['key'].values[:, 0].tolist(), right['b'].values[:, 0].tolist()))
+    b = np.array([lookup.get(key, np.nan) for key in left['key'].values[:, 0].tolist()])
+    return pdc.DataFrame({'key': left['key'].values[:, 0], 'a': left['a'].values[:, 0], 'b': b})
+
+
+
+if __name__ == '__main__':
+    for cardinality, n_keys in [('low', 1000), ('high', 1000000)]:
+        for sort in [False, True]:
+            left, right = make_frames(n_keys=n_keys, sort=sort)
+            label = f'{cardinality:>4} cardinality, {"sorted" if sort else "shuffled":>8} keys'
+            for how in ['inner', 'left', 'outer']:
+                timings = []
+                for algorithm in ['hash', 'sort']:
+                    seconds = best_time(lambda: left.merge(right, 'key', how, algorithm=algorithm))
+                    timings.append(f'{algorithm}: {seconds:6.3f} s')
+                timings = ' '.join(timings)
+                n_out = len(left.merge(right, 'key', how))
+                print(f'{label} {how:>5} ({n_out} rows)  {timings}')
+        if cardinality == 'low':
+            seconds = best_time(dict_lookup, left, right, repeat=1)
+            print(f'{"dict lookup":>37}        {seconds:6.3f} s')
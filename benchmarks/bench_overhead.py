@@ -0,0 +1,48 @@
+"""
+Measures the fixed cost of common operations on a 10-row DataFrame,
+where the work on the values is negligible and the cost of building the
+resulting DataFrame dominates.
+
+Run from the top-level directory of the repository:
+
+    python benchmarks/bench_overhead.py
+"""
+import timeit
+
+import numpy as np
+
+from _common import make_rng, pdc
+
+
+def make_frame(n_rows=10, n_cols=5):
+    rng = make_rng()
+    data = {f'c{i}': rng.random(n_rows) for i in range(n_cols - 1)}
+    data['s'] = rng.choice(np.array(['x', 'y', 'z'], dtype='O'), n_rows)
+    return pdc.DataFrame(data)
+
+
+def operations(df):
+    data = dict(df._data)
+    mask = df['c0'] > .5
+    numbers = df[['c0', 'c1', 'c2', 'c3']]
+    return {
+        'DataFrame(data)': lambda: pdc.DataFrame(data),
+        "df['c0']": lambda: df['c0'],
+        "df[['c0', 'c1']]": lambda: df[['c0', 'c1']],
+        'df[mask]': lambda: df[mask],
+        'df.head(3)': lambda: df.head(3),
+        'df.sum()': df.sum,
+        'df.abs()': df.abs,
+        'numbers + 1': lambda: numbers + 1,
+        "df.rename({'c0': 'a'})": lambda: df.rename({'c0': 'a'}),
+        "df.drop('c0')": lambda: df.drop('c0'),
+        "df.str.upper('s')": lambda: df.str.upper('s'),
+    }
+
+
+if __name__ == '__main__':
+    df = make_frame()
+    for name, func in operations(df).items():
+        n = 20000
+        seconds = min(timeit.repeat(func, number=n, repeat=5)) / n
+        print(f'{name:>24}: {seconds * 1e6:7.2f} us')
@@ -0,0 +1,36 @@
+"""
+Measures a compound row filter written with the logical operators and
+with DataFrame.query, on numeric, Categorical and object string columns.
+
+Run from the top-level directory of the repository:
+
+    python benchmarks/bench_query.py
+"""
+import numpy as np
+
+from _common import best_time, make_rng, pdc
+
+
+def make_frame(n_rows=1000000):
+    rng = make_rng()
+    names = rng.choice(np.array(['x', 'y', 'z'], dtype='O'), n_rows)
+    return pdc.DataFrame({'a': rng.random(n_rows), 'b': rng.integers(0, 10, n_rows),
+                          'c': rng.random(n_rows), 'name': names,
+                          'category': pdc.Categorical.from_array(names)})
+
+
+
+if __name__ == '__main__':
+    df = make_frame()
+    cases = {
+        'numeric': ("a > .9 and b < 2 and c > .5",
+                    lambda: df[(df['a'] > .9) & (df['b'] < 2) & (df['c'] > .5)]),
+        'categorical': ("a > .5 and b < 5 and category == 'x'",
+                        lambda: df[(df['a'] > .5) & (df['b'] < 5) & (df['category'] == 'x')]),
+        'object': ("a > .5 and b < 5 and name == 'x'",
+                   lambda: df[(df['a'] > .5) & (df['b'] < 5) & (df['name'] == 'x')]),
+    }
+    print(f'{len(df)} rows')
+    for name, (expr, operators) in cases.items():
+        print(f'{name:>12}  operators: {best_time(operators, repeat=5):6.4f} s  '
+              f'query: {best_time(df.query, expr, repeat=5):6.4f} s')
@@ -0,0 +1,69 @@
+"""
+Compares the block-based ``read_csv`` with the original line-by-line
+reader on ``data/employee.csv`` repeated 1000 times.
+
+Run from the top-level directory of the repository:
+
+    python benchmarks/bench_read_csv.py
+"""
+import os
+import tempfile
+from collections import defaultdict
+
+import numpy as np
+
+from _common import DATA, best_time, pdc
+
+SCALE = 1000
+
+
+def read_csv_lines(fn):
+    # the original implementation of read_csv
+    values = defaultdict(list)
+    with open(fn) as f:
+        header = f.readline()
+        column_names = header.strip('\n').split(',')
+        for line in f:
+            vals = line.strip('\n').split(',')
+            for val, name in zip(vals, column_names):
+                values[name].append(val)
+    new_data = {}
+    for col, vals in values.items():
+        try:
+            new_data[col] = np.array(vals, dtype='int')
+        except ValueError:
+            try:
+                new_data[col] = np.array(vals, dtype='float')
+            except ValueError:
+                new_data[col] = np.array(vals, dtype='O')
+    return pdc.DataFrame(new_data)
+
+
+def make_file(scale=SCALE):
+    with open(DATA) as f:
+        header = f.readline()
+        body = f.read()
+    fd, fn = tempfile.mkstemp(suffix='.csv')
+    with os.fdopen(fd, 'w') as f:
+        f.write(header)
+        for _ in range(scale):
+            f.write(body)
+    return fn
+
+
+
+if __name__ == '__main__':
+    fn = make_file()
+    try:
+        size = os.path.getsize(fn) / 2 ** 20
+        print(f'file size: {size:.1f} MB')
+        dtype = {'dept': 'str', 'race': 'str', 'gender': 'str', 'salary': 'int'}
+        for name, func in [('line-by-line', read_csv_lines),
+                           ('read_csv', pdc.read_csv),
+                           ('infer_rows', lambda fn: pdc.read_csv(fn, infer_rows=1000)),
+                           ('dtype', lambda fn: pdc.read_csv(fn, dtype=dtype)),
+                           ('workers=4', lambda fn: pdc.read_csv(fn, workers=4))]:
+            t = best_time(func, fn)
+            print(f'{name:>15}: {t:7.3f} s  {size / t:8.1f} MB/s')
+    finally:
+        os.remove(fn)
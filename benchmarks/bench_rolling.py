@@ -0,0 +1,25 @@
+"""
+Measures rolling mean, std and max for growing window sizes. The time
+should stay flat as the window grows.
+
+Run from the top-level directory of the repository:
+
+    python benchmarks/bench_rolling.py
+"""
+from _common import best_time, make_rng, pdc
+
+
+def make_frame(n_rows=1000000):
+    rng = make_rng()
+    return pdc.DataFrame({'a': rng.random(n_rows), 'b': rng.integers(0, 1000, n_rows)})
+
+
+
+if __name__ == '__main__':
+    df = make_frame()
+    print(f'{df.shape[0]} rows')
+    for window in [10, 1000, 100000]:
+        rolling = df.rolling(window)
+        timings = ' '.join(f'{name:>6}: {best_time(getattr(rolling, name)):6.3f} s'
+                           for name in ['mean', 'std', 'max'])
+        print(f'window={window:<7} {timings}')
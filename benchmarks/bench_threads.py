@@ -0,0 +1,29 @@
+"""
+Measures how column-parallel execution scales with the 'threads' option
+on a wide DataFrame, for an aggregation (std), an operator (* 1.1) and
+an element-wise method (cumsum).
+
+Run from the top-level directory of the repository:
+
+    python benchmarks/bench_threads.py
+"""
+import os
+
+from _common import best_time, make_rng, pdc
+
+
+def make_frame(n_rows=200000, n_cols=200):
+    rng = make_rng()
+    return pdc.DataFrame({f'c{i}': rng.random(n_rows) for i in range(n_cols)})
+
+
+
+if __name__ == '__main__':
+    df = make_frame()
+    operations = {'std()': df.std, '* 1.1': lambda: df * 1.1, 'cumsum()': df.cumsum}
+    print(f'{os.cpu_count()} CPUs, {df.shape[0]} rows x {df.shape[1]} columns')
+    for threads in [1, 2, 4, 8]:
+        with pdc.option_context('threads', threads):
+            timings = ' '.join(f'{name:>9}: {best_time(func):6.3f} s'
+                               for name, func in operations.items())
+        print(f'threads={threads}  {timings}')
@@ -0,0 +1,53 @@
+"""
+Measures the throughput of ``DataFrame.to_csv`` in MB/s against a
+hand-written loop over ``df.values``.
+
+Run from the top-level directory of the repository:
+
+    python benchmarks/bench_to_csv.py
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from _common import DATA, make_rng, pdc
+
+
+def to_csv_loop(df, path):
+    with open(path, 'w') as f:
+        f.write(','.join(df.columns) + '\n')
+        for row in df.values:
+            f.write(','.join('' if val is None else str(val) for val in row) + '\n')
+
+
+def make_frames():
+    emp = pdc.read_csv(DATA)
+    employee = pdc.DataFrame({col: np.tile(values, 200) for col, values in emp._data.items()})
+    n = 1000000
+    rng = make_rng()
+    numeric = pdc.DataFrame({'a': np.arange(n),
+                             'b': rng.random(n),
+                             'c': rng.random(n) > .5,
+                             'd': rng.integers(-10 ** 6, 10 ** 6, n)})
+    return {'employee x200': employee, 'numeric 1M': numeric}
+
+
+def throughput(func, df, path):
+    start = time.perf_counter()
+    func(df, path)
+    elapsed = time.perf_counter() - start
+    return os.path.getsize(path) / 2 ** 20 / elapsed
+
+
+if __name__ == '__main__':
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    try:
+        for name, df in make_frames().items():
+            for label, func in [('values loop', to_csv_loop),
+                                ('to_csv', lambda df, path: df.to_csv(path))]:
+                print(f'{name:>14} {label:>12}: {throughput(func, df, path):8.1f} MB/s')
+    finally:
+        os.remove(path)
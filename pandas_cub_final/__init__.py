@@ -10,6 +10,10 @@ class DataFrame:
         A DataFrame holds two-dimensional heterogeneous data. Create it by
         passing a dictionary of NumPy arrays to the values parameter
 
+        Columns are shared without copying between DataFrames derived from
+        one another. A column is copied only when it is modified in place,
+        and only if the DataFrame does not own it.
+
         Parameters
         ----------
         data: dict
@@ -25,9 +29,34 @@ class DataFrame:
         # convert unicode arrays to object
         self._data = self._convert_unicode_to_object(data)
 
+        # names of the columns no other DataFrame or caller can see,
+        # which are the only ones modified without a copy
+        self._owned = set()
+
+        # validity bitmaps of the columns, see `_validity`
+        self._valid_bits = {}
+
+    @classmethod
+    def _from_trusted(cls, data, owned=()):
+        """
+        Creates a DataFrame without checking `data`. Methods use it for
+        columns they built themselves, which are already 1-D arrays,
+        Categoricals or StringArrays of equal length with string names
+        and no unicode dtype. The arrays of the `owned` columns were
+        allocated for the new DataFrame alone, so they are later
+        modified without a copy.
+        """
+        df = cls.__new__(cls)
+        df._data = data
+        # encoded string columns are always replaced rather than modified
+        df._owned = {col for col in owned if isinstance(data[col], np.ndarray)}
+        df._valid_bits = {}
+        return df
+
+    @property
+    def str(self):
         # Allow for special methods for strings
-        self.str = StringMethods(self)
-        self._add_docs()
+        return StringMethods(self)
 
     def _check_input_types(self, data):
         if not isinstance(data, dict):
@@ -36,7 +65,7 @@ class DataFrame:
         for col_name, values in data.items():
             if not isinstance(col_name, str):
                 raise TypeError('All column names must be a string')
-            if not isinstance(values, np.ndarray):
+            if not isinstance(values, (np.ndarray, Categorical, StringArray)):
                 raise TypeError('All values must be a 1-D NumPy array')
             else:
                 if values.ndim != 1:
@@ -107,6 +136,9 @@ class DataFrame:
             raise ValueError('Column names must be unique')
 
         new_data = dict(zip(columns, self._data.values()))
+        self._owned = {new for old, new in zip(self._data, columns) if old in self._owned}
+        self._valid_bits = {new: self._valid_bits[old] for old, new in zip(self._data, columns)
+                            if old in self._valid_bits}
         self._data = new_data
 
     @property
@@ -213,7 +245,7 @@ class DataFrame:
         -------
         A single 2D NumPy array of the underlying data
         """
-        return np.column_stack(self._data.values())
+        return np.column_stack(list(self._data.values()))
 
     @property
     def dtypes(self):
@@ -227,6 +259,9 @@ class DataFrame:
         col_arr = np.array(self.columns)
         dtypes = []
         for values in self._data.values():
+            if isinstance(values, Categorical):
+                dtypes.append('category')
+                continue
             kind = values.dtype.kind
             dtype = DTYPE_NAME[kind]
             dtypes.append(dtype)
@@ -240,10 +275,12 @@ class DataFrame:
         A single string selects one column -> df['colname']
         A list of strings selects multiple columns -> df[['colname1', 'colname2']]
         A one column DataFrame of booleans that filters rows -> df[df_bool]
+        A NumPy array of integers or booleans selects rows -> df[arr]
 
         Row and column selection simultaneously -> df[rs, cs]
             where cs and rs can be integers, slices, or a list of integers
-            rs can also be a one-column boolean DataFrame
+            rs can also be a one-column boolean DataFrame or a NumPy array
+            of integers or booleans
 
         Returns
         -------
@@ -251,11 +288,15 @@ class DataFrame:
         """
         # select a single column -> df['colname']
         if isinstance(item, str):
-            return DataFrame({item: self._data[item]})
+            df = DataFrame._from_trusted({item: self._data[item]})
+            self._release([item])
+            return df
 
         # select multiple columns -> df[['colname1', 'colname2']]
         if isinstance(item, list):
-            return DataFrame({col: self._data[col] for col in item})
+            df = DataFrame._from_trusted({col: self._data[col] for col in item})
+            self._release(item)
+            return df
 
         # boolean selection
         if isinstance(item, DataFrame):
@@ -266,15 +307,16 @@ class DataFrame:
             if bool_arr.dtype.kind != 'b':
                 raise TypeError('DataFrame must be a boolean')
 
-            new_data = {}
-            for col, values in self._data.items():
-                new_data[col] = values[bool_arr]
-            return DataFrame(new_data)
+            # the positions are found once and gathered from every column
+            return self._take(np.flatnonzero(bool_arr))
+
+        if isinstance(item, np.ndarray):
+            return self._take(_check_row_array(item))
 
         if isinstance(item, tuple):
             return self._getitem_tuple(item)
         else:
-            raise TypeError('Select with either a string, a list, or a row and column '
+            raise TypeError('Select with either a string, a list, an array, or a row and column '
                             'simultaneous selection')
 
     def _getitem_tuple(self, item):
@@ -282,8 +324,21 @@ class DataFrame:
         if len(item) != 2:
             raise ValueError('Pass either a single string or a two-item tuple inside the '
                                 'selection operator.')
-        row_selection = item[0]
-        col_selection = item[1]
+        row_selection = self._row_selection(item[0])
+        col_selection = self._col_selection(item[1])
+
+        new_data = {}
+        for col in col_selection:
+            new_data[col] = self._data[col][row_selection]
+        if isinstance(row_selection, slice):
+            # slices are views of the columns
+            self._release(col_selection)
+            return DataFrame._from_trusted(new_data)
+        # positions and masks gather new copies
+        return DataFrame._from_trusted(new_data, owned=new_data)
+
+    def _row_selection(self, row_selection):
+        # converts the row part of df[rs, cs] into an index for every column
         if isinstance(row_selection, int):
             row_selection = [row_selection]
         elif isinstance(row_selection, DataFrame):
@@ -292,9 +347,19 @@ class DataFrame:
             row_selection = next(iter(row_selection._data.values()))
             if row_selection.dtype.kind != 'b':
                 raise TypeError('DataFrame must be a boolean')
-        elif not isinstance(row_selection, (list, slice)):
-            raise TypeError('Row selection must be either an int, slice, list, or DataFrame')
-
+        elif isinstance(row_selection, list):
+            # convert once so every column is indexed with the same array
+            row_selection = np.asarray(row_selection)
+            if row_selection.size == 0:
+                row_selection = row_selection.astype('int')
+        elif isinstance(row_selection, np.ndarray):
+            row_selection = _check_row_array(row_selection)
+        elif not isinstance(row_selection, slice):
+            raise TypeError('Row selection must be either an int, slice, list, array, or DataFrame')
+        return row_selection
+
+    def _col_selection(self, col_selection):
+        # converts the column part of df[rs, cs] into a list of column names
         if isinstance(col_selection, int):
             col_selection = [self.columns[col_selection]]
         elif isinstance(col_selection, str):
@@ -319,17 +384,17 @@ class DataFrame:
             col_selection = self.columns[start:stop:step]
         else:
             raise TypeError('Column selection must be either an int, string, list, or slice')
-
-        new_data = {}
-        for col in col_selection:
-            new_data[col] = self._data[col][row_selection]
-        return DataFrame(new_data)
+        return col_selection
 
     def _ipython_key_completions_(self):
         # allows for tab completion when doing df['c
         return self.columns
 
     def __setitem__(self, key, value):
+        # sets values of existing columns in place -> df[rs, cs] = value
+        if isinstance(key, tuple):
+            return self._setitem_tuple(key, value)
+
         # adds a new column or a overwrites an old column
         if not isinstance(key, str):
             raise NotImplementedError('Only able to set a single column')
@@ -344,7 +409,11 @@ class DataFrame:
                 raise ValueError('Setting DataFrame must be one column')
             if len(value) != len(self):
                 raise ValueError('Setting and Calling DataFrames must be the same length')
+            value._release()
             value = next(iter(value._data.values()))
+        elif isinstance(value, (Categorical, StringArray)):
+            if len(value) != len(self):
+                raise ValueError('Setting array must be same length as DataFrame')
         elif isinstance(value, (int, str, float, bool)):
             value = np.repeat(value, len(self))
         else:
@@ -355,6 +424,54 @@ class DataFrame:
             value = value.astype('O')
 
         self._data[key] = value
+        self._owned.discard(key)
+        self._valid_bits.pop(key, None)
+
+    def _setitem_tuple(self, key, value):
+        """
+        Assigns to the selected rows of one or more existing columns.
+        Columns this DataFrame does not own are copied first, so no other
+        DataFrame sees the change.
+        """
+        if len(key) != 2:
+            raise ValueError('Pass a two-item tuple of rows and columns to set values')
+        row_selection = self._row_selection(key[0])
+        col_selection = self._col_selection(key[1])
+        if isinstance(value, DataFrame):
+            if value.shape[1] != 1:
+                raise ValueError('Setting DataFrame must be one column')
+            value = next(iter(value._data.values()))
+        for col in col_selection:
+            if col not in self._data:
+                raise KeyError(f'{col} is not a column')
+        for col in col_selection:
+            self._writable(col)[row_selection] = value
+
+    def _release(self, columns=None):
+        # the columns are now shared, so they must be copied before being modified
+        if columns is None:
+            self._owned.clear()
+        else:
+            self._owned.difference_update(columns)
+
+    def _writable(self, col):
+        """
+        Returns the array of a column that may be modified in place,
+        copying it first if the column is shared
+        """
+        # the caller changes the values, so the missing values may change
+        self._valid_bits.pop(col, None)
+        values = self._data[col]
+        if col in self._owned:
+            return values
+        if isinstance(values, (Categorical, StringArray)):
+            # encoded strings are replaced with a new object array
+            values = np.asarray(values)
+        else:
+            values = values.copy()
+        self._data[col] = values
+        self._owned.add(col)
+        return values
 
     def head(self, n=5):
         """
@@ -386,60 +503,83 @@ class DataFrame:
 
     #### Aggregation Methods ####
 
-    def min(self):
-        return self._agg(np.min)
+    def min(self, skipna=False):
+        return self._agg(np.min, skipna)
 
-    def max(self):
-        return self._agg(np.max)
+    def max(self, skipna=False):
+        return self._agg(np.max, skipna)
 
-    def mean(self):
-        return self._agg(np.mean)
+    def mean(self, skipna=False):
+        return self._agg(np.mean, skipna)
 
-    def median(self):
-        return self._agg(np.median)
+    def median(self, skipna=False):
+        return self._agg(np.median, skipna)
 
-    def sum(self):
-        return self._agg(np.sum)
+    def sum(self, skipna=False):
+        return self._agg(np.sum, skipna)
 
-    def var(self):
-        return self._agg(np.var)
+    def var(self, skipna=False):
+        return self._agg(np.var, skipna)
 
-    def std(self):
-        return self._agg(np.std)
+    def std(self, skipna=False):
+        return self._agg(np.std, skipna)
 
-    def all(self):
-        return self._agg(np.all)
+    def all(self, skipna=False):
+        return self._agg(np.all, skipna)
 
-    def any(self):
-        return self._agg(np.any)
+    def any(self, skipna=False):
+        return self._agg(np.any, skipna)
 
-    def argmax(self):
-        return self._agg(np.argmax)
+    def argmax(self, skipna=False):
+        return self._agg(np.argmax, skipna)
 
-    def argmin(self):
-        return self._agg(np.argmin)
+    def argmin(self, skipna=False):
+        return self._agg(np.argmin, skipna)
 
-    def _agg(self, aggfunc):
+    def _agg(self, aggfunc, skipna=False):
         """
         Generic aggregation function that applies the
-        aggregation to each column
+        aggregation to each column. The columns are processed in
+        parallel when the 'threads' option is greater than 1.
 
         Parameters
         ----------
         aggfunc: str of the aggregation function name in NumPy
+        skipna: bool
+            If True, columns with missing values are aggregated over
+            their valid values only, without copying the column where
+            NumPy can skip them with a `where` mask
 
         Returns
         -------
         A DataFrame
         """
-        new_data = {}
-        for col, values in self._data.items():
+        columns = list(self._data.values())
+        if skipna:
+            # only columns with missing values need a mask
+            masks = [self._valid_mask(col) for col in self.columns]
+            columns = list(zip(columns, masks))
+
+        def reduce(column):
             try:
-                val = aggfunc(values)
+                if skipna:
+                    values, valid = column
+                    if valid is not None:
+                        return _skipna_reduce(values, valid, aggfunc)
+                else:
+                    values = column
+                if isinstance(values, (Categorical, StringArray)):
+                    return values._reduce(aggfunc)
+                return aggfunc(values)
             except TypeError:
-                continue
-            new_data[col] = np.array([val])
-        return DataFrame(new_data)
+                # columns that cannot be aggregated are left out
+                return _SKIP
+
+        new_data = {}
+        for col, val in zip(self.columns, _map_columns(reduce, columns)):
+            if val is not _SKIP:
+                new_data[col] = np.array([val], dtype='O' if isinstance(val, str) else None)
+        return DataFrame._from_trusted(new_data, owned=new_data)
 
     def isna(self):
         """
@@ -450,13 +590,10 @@ class DataFrame:
         A DataFrame of booleans the same size as the calling DataFrame
         """
         new_data = {}
-        for col, values in self._data.items():
-            kind = values.dtype.kind
-            if kind == 'O':
-                new_data[col] = values == None
-            else:
-                new_data[col] = np.isnan(values)
-        return DataFrame(new_data)
+        for col in self._data:
+            valid = self._valid_mask(col)
+            new_data[col] = np.zeros(len(self), dtype='bool') if valid is None else ~valid
+        return DataFrame._from_trusted(new_data, owned=new_data)
 
     def count(self):
         """
@@ -467,12 +604,105 @@ class DataFrame:
         A DataFrame
         """
         new_data = {}
-        df = self.isna()
-        length = len(self)
-        for col, values in df._data.items():
-            val = length - values.sum()
-            new_data[col] = np.array([val])
-        return DataFrame(new_data)
+        for col in self._data:
+            new_data[col] = np.array([self._validity(col)[1]])
+        return DataFrame._from_trusted(new_data)
+
+    def _validity(self, col):
+        """
+        Finds the missing values of a column: NaN in float columns and
+        None in string columns. The result is cached until the column is
+        changed.
+
+        Returns
+        -------
+        A tuple of the validity bitmap, which is None when every value
+        is valid, and the number of valid values
+        """
+        if col in self._valid_bits:
+            return self._valid_bits[col]
+        values = self._data[col]
+        if isinstance(values, StringArray):
+            bits = values.valid
+        elif isinstance(values, Categorical):
+            bits = np.packbits(values.codes >= 0, bitorder='little')
+        elif values.dtype.kind == 'O':
+            bits = np.packbits(values != None, bitorder='little')
+        elif values.dtype.kind == 'f':
+            bits = np.packbits(~np.isnan(values), bitorder='little')
+        else:
+            bits = None
+        n_valid = len(values) if bits is None else int(_POPCOUNT[bits].sum())
+        if n_valid == len(values):
+            bits = None
+        self._valid_bits[col] = bits, n_valid
+        return bits, n_valid
+
+    def _valid_mask(self, col):
+        # the validity bitmap unpacked to one bool per row, or None if all are valid
+        bits = self._validity(col)[0]
+        if bits is None:
+            return None
+        return np.unpackbits(bits, count=len(self), bitorder='little').view('bool')
+
+    def agg(self, aggfuncs):
+        """
+        Computes several statistics of every column at once. Each column
+        is read as few times as possible: the sum, mean, variance and
+        standard deviation come from one pass over the values, and all
+        percentiles, the minimum and the maximum come from one partition
+        of them. Missing values are skipped, and the statistics of a
+        column without valid values are NaN, except a count of 0.
+
+        Parameters
+        ----------
+        aggfuncs: list of statistic names
+            'count', the name of a NumPy reduction such as 'mean' or
+            'max', or a percentile such as '25%'
+
+        Returns
+        -------
+        A DataFrame with a 'statistic' column of the names followed by
+        one column per column that supports every statistic. A ValueError
+        is raised if the DataFrame already has a 'statistic' column.
+        """
+        if not isinstance(aggfuncs, list):
+            raise TypeError('`aggfuncs` must be a list of statistic names')
+        for name in aggfuncs:
+            if not isinstance(name, str):
+                raise TypeError('Each statistic must be a string')
+            if name != 'count' and not _is_percentile(name) and name not in _AGG_FUNCS:
+                raise ValueError(f'{name} is not a supported statistic')
+        if 'statistic' in self._data:
+            raise ValueError("The column 'statistic' would be replaced by the names "
+                             'of the statistics')
+
+        def describe(column):
+            try:
+                return _column_stats(*column, aggfuncs)
+            except TypeError:
+                return _SKIP
+
+        columns = [(values, self._valid_mask(col)) for col, values in self._data.items()]
+        new_data = {'statistic': np.array(aggfuncs, dtype='O')}
+        for col, stats in zip(self.columns, _map_columns(describe, columns)):
+            if stats is not _SKIP:
+                # keep counts as numbers next to string minimums and maximums
+                has_strings = any(isinstance(stat, str) for stat in stats)
+                new_data[col] = np.array(stats, dtype='O' if has_strings else None)
+        return DataFrame._from_trusted(new_data)
+
+    def describe(self):
+        """
+        Summarizes the int and float columns with their count, mean,
+        standard deviation, minimum, quartiles and maximum
+
+        Returns
+        -------
+        A DataFrame
+        """
+        numeric = [col for col, values in self._data.items() if values.dtype.kind in 'if']
+        return self[numeric].agg(['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'])
 
     def unique(self):
         """
@@ -484,7 +714,10 @@ class DataFrame:
         """
         dfs = []
         for col, values in self._data.items():
-            uniques = np.unique(values)
+            if isinstance(values, Categorical):
+                uniques = values.categories[np.unique(values.codes[values.codes >= 0])]
+            else:
+                uniques = np.unique(values)
             dfs.append(DataFrame({col: uniques}))
         if len(dfs) == 1:
             return dfs[0]
@@ -500,6 +733,8 @@ class DataFrame:
         """
         new_data = {}
         for col, value in self._data.items():
+            if isinstance(value, Categorical):
+                value = value.codes
             new_data[col] = np.array([len(np.unique(value))])
         return DataFrame(new_data)
 
@@ -518,8 +753,14 @@ class DataFrame:
         """
         dfs = []
         for col, values in self._data.items():
-            keys, raw_counts = np.unique(values, return_counts=True)
-            
+            if isinstance(values, Categorical):
+                codes = values.codes[values.codes >= 0]
+                raw_counts = np.bincount(codes, minlength=len(values.categories))
+                keys = values.categories[raw_counts > 0]
+                raw_counts = raw_counts[raw_counts > 0]
+            else:
+                keys, raw_counts = np.unique(values, return_counts=True)
+
             order = np.argsort(-raw_counts)
             keys = keys[order]
             raw_counts = raw_counts[order]
@@ -551,7 +792,11 @@ class DataFrame:
         new_data = {}
         for col, values in self._data.items():
             new_data[columns.get(col, col)] = values
-        return DataFrame(new_data)
+        for col in new_data:
+            if not isinstance(col, str):
+                raise TypeError('All column names must be a string')
+        self._release()
+        return DataFrame._from_trusted(new_data)
 
     def drop(self, columns):
         """
@@ -573,7 +818,8 @@ class DataFrame:
         for col, values in self._data.items():
             if col not in columns:
                 new_data[col] = values
-        return DataFrame(new_data)
+        self._release()
+        return DataFrame._from_trusted(new_data)
 
     #### Non-Aggregation Methods ####
 
@@ -645,17 +891,20 @@ class DataFrame:
 
     def copy(self):
         """
-        Copies the DataFrame
+        Copies the DataFrame. The columns are shared until either
+        DataFrame modifies them, which copies only that column.
 
         Returns
         -------
         A DataFrame
         """
-        return self._non_agg(np.copy)
+        self._release()
+        return DataFrame._from_trusted(dict(self._data))
 
     def _non_agg(self, funcname, kinds='bif', **kwargs):
         """
-        Generic non-aggregation function
+        Generic non-aggregation function. The columns are processed in
+        parallel when the 'threads' option is greater than 1.
 
         Parameters
         ----------
@@ -666,14 +915,41 @@ class DataFrame:
         -------
         A DataFrame
         """
-        new_data = {}
-        for col, values in self._data.items():
+        def apply(values):
             if values.dtype.kind in kinds:
-                values = funcname(values, **kwargs)
-            else:
-                values = values.copy()
-            new_data[col] = values
-        return DataFrame(new_data)
+                return funcname(values, **kwargs)
+            return values
+
+        new_data = dict(zip(self.columns, _map_columns(apply, self._data.values())))
+        # other columns, and results such as rounded integers that NumPy
+        # returns unchanged, are shared instead of copied
+        shared = [col for col, values in new_data.items() if values is self._data[col]]
+        self._release(shared)
+        return DataFrame._from_trusted(new_data, owned=set(new_data) - set(shared))
+
+    def shift(self, n=1):
+        """
+        Moves the values down n rows, or up when n is negative. The rows
+        left empty are NaN, or None for string columns.
+
+        Parameters
+        ----------
+        n: int
+
+        Returns
+        -------
+        A DataFrame
+        """
+        def func(values):
+            if values.dtype.kind == 'O':
+                # strings keep their column type, position -1 leaves a row missing
+                rows = np.arange(len(values)) - n
+                rows[(rows < 0) | (rows >= len(values))] = -1
+                return _take_missing(values, rows)
+            out, current, previous = _shifted_output(len(values), n)
+            out[current] = values[previous]
+            return out
+        return self._non_agg(func, kinds='bifO')
 
     def diff(self, n=1):
         """
@@ -689,14 +965,9 @@ class DataFrame:
         A DataFrame
         """
         def func(values):
-            values = values.astype('float')
-            values_shifted = np.roll(values, n)
-            values = values - values_shifted
-            if n >= 0:
-                values[:n] = np.NAN
-            else:
-                values[n:] = np.NAN
-            return values
+            out, current, previous = _shifted_output(len(values), n)
+            np.subtract(values[current], values[previous], out=out[current], dtype='float')
+            return out
         return self._non_agg(func)
 
     def pct_change(self, n=1):
@@ -713,16 +984,42 @@ class DataFrame:
         A DataFrame
         """
         def func(values):
-            values = values.astype('float')
-            values_shifted = np.roll(values, n)
-            values = values - values_shifted
-            if n >= 0:
-                values[:n] = np.NAN
-            else:
-                values[n:] = np.NAN
-            return values / values_shifted
+            out, current, previous = _shifted_output(len(values), n)
+            np.subtract(values[current], values[previous], out=out[current], dtype='float')
+            np.divide(out[current], values[previous], out=out[current], dtype='float')
+            return out
         return self._non_agg(func)
 
+    def rolling(self, window):
+        """
+        Creates moving-window calculations over the rows. Each result
+        uses the current row and the `window - 1` rows above it. It is
+        NaN until a full window is available and whenever the window
+        holds a NaN.
+
+        Parameters
+        ----------
+        window: int of the number of rows in each window
+
+        Returns
+        -------
+        A Rolling object with sum, mean, var, std, min and max methods
+        """
+        if not isinstance(window, (int, np.integer)) or window < 1:
+            raise ValueError('`window` must be a positive integer')
+        return Rolling(self, int(window))
+
+    def expanding(self):
+        """
+        Creates calculations over a window that grows from the first row
+        to the current row
+
+        Returns
+        -------
+        A Rolling object with sum, mean, var, std, min and max methods
+        """
+        return Rolling(self, None)
+
     #### Arithmetic and Comparison Operators ####
 
     def __add__(self, other):
@@ -779,9 +1076,32 @@ class DataFrame:
     def __eq__(self, other):
         return self._oper('__eq__', other)
 
+    def __and__(self, other):
+        return self._oper('__and__', other)
+
+    def __rand__(self, other):
+        return self._oper('__rand__', other)
+
+    def __or__(self, other):
+        return self._oper('__or__', other)
+
+    def __ror__(self, other):
+        return self._oper('__ror__', other)
+
+    def __xor__(self, other):
+        return self._oper('__xor__', other)
+
+    def __rxor__(self, other):
+        return self._oper('__rxor__', other)
+
+    def __invert__(self):
+        new_data = dict(zip(self.columns, _map_columns(np.invert, self._data.values())))
+        return DataFrame._from_trusted(new_data, owned=new_data)
+
     def _oper(self, op, other):
         """
-        Generic operator method
+        Generic operator method. The columns are processed in parallel
+        when the 'threads' option is greater than 1.
 
         Parameters
         ----------
@@ -792,19 +1112,92 @@ class DataFrame:
         -------
         A DataFrame
         """
+        # results with a scalar or another column keep the shape of the
+        # columns, while other arrays may broadcast to any shape
         if isinstance(other, DataFrame):
             if other.shape[1] != 1:
                 raise ValueError('`other` must be a one-column DataFrame')
             other = next(iter(other._data.values()))
-        new_data = {}
-        for col, values in self._data.items():
-            func = getattr(values, op)
-            new_data[col] = func(other)
-        return DataFrame(new_data)
+            trusted = True
+        else:
+            trusted = np.ndim(other) == 0
+        results = _map_columns(lambda values: _apply_oper(values, op, other),
+                               self._data.values())
+        new_data = dict(zip(self.columns, results))
+        if not trusted:
+            return DataFrame(new_data)
+        return DataFrame._from_trusted(new_data, owned=new_data)
+
+    def __iadd__(self, other):
+        return self._ioper('__add__', other)
+
+    def __isub__(self, other):
+        return self._ioper('__sub__', other)
+
+    def __imul__(self, other):
+        return self._ioper('__mul__', other)
+
+    def __itruediv__(self, other):
+        return self._ioper('__truediv__', other)
+
+    def __ifloordiv__(self, other):
+        return self._ioper('__floordiv__', other)
+
+    def __ipow__(self, other):
+        return self._ioper('__pow__', other)
+
+    def _ioper(self, op, other):
+        """
+        Generic in-place operator method. Number columns whose data type
+        does not change are written in place, after a copy if they are
+        shared. The others are replaced with the result of the operator.
+        Every replacement is computed before any column is changed, so an
+        operation that fails leaves the DataFrame unchanged.
+
+        Parameters
+        ----------
+        op: str name of the special method of the operator
+        other: the other object being operated on
+
+        Returns
+        -------
+        The DataFrame itself
+        """
+        if isinstance(other, DataFrame):
+            if other.shape[1] != 1:
+                raise ValueError('`other` must be a one-column DataFrame')
+            other = next(iter(other._data.values()))
+        # find the data type of each result from its first row, so that
+        # an invalid operation raises before any column is modified
+        first = other[:1] if np.ndim(other) else other
+        in_place = [isinstance(values, np.ndarray) and values.dtype.kind in 'biufc'
+                    and _apply_oper(values[:1], op, first).dtype == values.dtype
+                    for values in self._data.values()]
+        # other columns may still fail on a later row
+        replaced = {col: _apply_oper(values, op, other)
+                    for (col, values), same_dtype in zip(self._data.items(), in_place)
+                    if not same_dtype}
+        for values in replaced.values():
+            if isinstance(values, np.ndarray) and values.shape != (len(self),):
+                raise ValueError('`other` must have one value per row')
+
+        # writing in place fails, if at all, on the shape of `other` before
+        # the first value is written
+        ufunc = _INPLACE_UFUNCS[op]
+        for col, same_dtype in zip(self.columns, in_place):
+            if same_dtype:
+                ufunc(self._data[col], other, out=self._writable(col))
+        for col, values in replaced.items():
+            self._data[col] = values
+            self._owned.add(col)
+            self._valid_bits.pop(col, None)
+        return self
 
     def sort_values(self, by, asc=True):
         """
-        Sort the DataFrame by one or more values
+        Sort the DataFrame by one or more values. The sort is stable:
+        rows with equal values keep their order, or the reverse of it
+        when `asc` is False.
 
         Parameters
         ----------
@@ -816,16 +1209,69 @@ class DataFrame:
         A DataFrame
         """
         if isinstance(by, str):
-            order = np.argsort(self._data[by])
-        elif isinstance(by, list):
-            cols = [self._data[col] for col in by[::-1]]
-            order = np.lexsort(cols)
-        else:
+            by = [by]
+        elif not isinstance(by, list):
+            raise TypeError('`by` must be a str or a list')
+        order = _sort_order([self._data[col] for col in by], asc)
+        return self._take(order)
+
+    def nlargest(self, n, by):
+        """
+        Returns the n rows with the largest values without sorting every
+        row. The result is identical to `sort_values(by, asc=False).head(n)`.
+
+        Parameters
+        ----------
+        n: int
+        by: str or list of column names
+
+        Returns
+        -------
+        A DataFrame
+        """
+        return self._top_k(n, by, False)
+
+    def nsmallest(self, n, by):
+        """
+        Returns the n rows with the smallest values without sorting every
+        row. The result is identical to `sort_values(by).head(n)`.
+
+        Parameters
+        ----------
+        n: int
+        by: str or list of column names
+
+        Returns
+        -------
+        A DataFrame
+        """
+        return self._top_k(n, by, True)
+
+    def _top_k(self, n, by, asc):
+        if not isinstance(n, int) or n < 0:
+            raise ValueError('`n` must be a non-negative integer')
+        if isinstance(by, str):
+            by = [by]
+        elif not isinstance(by, list):
             raise TypeError('`by` must be a str or a list')
+        order = _top_k_order([self._data[col] for col in by], n, asc)
+        return self._take(order)
+
+    def _take(self, rows):
+        """
+        Gathers the same rows from every column. This is the shared path
+        for every row selection by position.
 
-        if not asc:
-            order = order[::-1]
-        return self[order.tolist(), :]
+        Parameters
+        ----------
+        rows: 1-D NumPy array of integer positions or a boolean mask
+
+        Returns
+        -------
+        A DataFrame
+        """
+        new_data = {col: values[rows] for col, values in self._data.items()}
+        return DataFrame._from_trusted(new_data, owned=new_data)
 
     def sample(self, n=None, frac=None, replace=False, seed=None):
         """
@@ -855,8 +1301,43 @@ class DataFrame:
         if n is not None:
             if not isinstance(n, int):
                 raise TypeError('`n` must be an int')
-            rows = np.random.choice(np.arange(len(self)), size=n, replace=replace).tolist()
-        return self[rows, :]
+            rows = np.random.choice(np.arange(len(self)), size=n, replace=replace)
+        return self._take(rows)
+
+    def query(self, expr):
+        """
+        Selects the rows where a boolean expression of the columns is
+        True, e.g. "a > 1 and (b < 5 or c == 'x')"
+
+        The expression may use column names, numbers, strings, True,
+        False and None, comparisons (including chained ones and `in` a
+        list), arithmetic, `&`, `|`, `^`, `~`, `and`, `or` and `not`.
+
+        The expression is evaluated over blocks of rows small enough to
+        stay in the CPU cache, and each block writes its part of a
+        single mask. Within a block, `and` and `or` stop once every row
+        is decided, and operands on string columns are only evaluated on
+        the rows whose result is not decided yet. The selected rows are
+        then gathered from every column with one array of positions.
+
+        Parameters
+        ----------
+        expr: str
+
+        Returns
+        -------
+        A DataFrame
+        """
+        if not isinstance(expr, str):
+            raise TypeError('`expr` must be a string')
+        tree, used = _parse_query(expr, self._data)
+        n = len(self)
+        mask = np.empty(n, dtype='bool')
+        for start in range(0, n, _QUERY_BLOCK_SIZE):
+            stop = min(start + _QUERY_BLOCK_SIZE, n)
+            block = {col: self._data[col][start:stop] for col in used}
+            mask[start:stop] = _eval_query(tree, block, stop - start)
+        return self._take(np.flatnonzero(mask))
 
     def pivot_table(self, rows=None, columns=None, values=None, aggfunc=None):
         """
@@ -891,108 +1372,744 @@ class DataFrame:
                 raise ValueError('You cannot provide `aggfunc` when `values` is None')
 
         if rows is not None:
-            row_data = self._data[rows]
+            row_codes, row_keys = _factorize(self._data[rows])
 
         if columns is not None:
-            col_data = self._data[columns]
+            col_codes, col_keys = _factorize(self._data[columns])
 
         if rows is None:
             pivot_type = 'columns'
+            codes, n_groups = col_codes, len(col_keys)
         elif columns is None:
             pivot_type = 'rows'
+            codes, n_groups = row_codes, len(row_keys)
         else:
             pivot_type = 'all'
-        
-        from collections import defaultdict
-        d = defaultdict(list)
-        if pivot_type == 'columns':
-            for group, val in zip(col_data, val_data):
-                d[group].append(val)
-        elif pivot_type == 'rows':
-            for group, val in zip(row_data, val_data):
-                d[group].append(val)
-        else:
-            for group1, group2, val in zip(row_data, col_data, val_data):
-                d[(group1, group2)].append(val)
+            # only the combinations that appear in the data are aggregated
+            combined = row_codes * len(col_keys) + col_codes
+            present, codes = np.unique(combined, return_inverse=True)
+            n_groups = len(present)
 
-        agg_dict = {}
-        for group, vals in d.items():
-            arr = np.array(vals)
-            func = getattr(np, aggfunc)
-            agg_dict[group] = func(arr)
+        agg_values = _group_reduce(val_data, codes, n_groups, aggfunc)
 
         new_data = {}
         if pivot_type == 'columns':
-            for col_name in sorted(agg_dict):
-                value = agg_dict[col_name]
+            for col_name, value in zip(col_keys, agg_values):
                 new_data[col_name] = np.array([value])
         elif pivot_type == 'rows':
-            row_array = np.array(list(agg_dict.keys()))
-            val_array = np.array(list(agg_dict.values()))
-
-            order = np.argsort(row_array)
-            new_data[rows] = row_array[order]
-            new_data[aggfunc] = val_array[order]
+            new_data[rows] = row_keys
+            new_data[aggfunc] = agg_values
         else:
-            row_set = set()
-            col_set = set()
-            for group in agg_dict:
-                row_set.add(group[0])
-                col_set.add(group[1])
-            row_list = sorted(row_set)
-            col_list = sorted(col_set)
-            new_data = {}
-            new_data[rows] = np.array(row_list)
-            for col in col_list:
-                new_vals = []
-                for row in row_list:
-                    new_val = agg_dict.get((row, col), np.nan)
-                    new_vals.append(new_val)
-                new_data[col] = np.array(new_vals)
+            shape = len(row_keys), len(col_keys)
+            table = np.zeros(shape[0] * shape[1], dtype=agg_values.dtype)
+            table[present] = agg_values
+            table = table.reshape(shape)
+            found = np.zeros(shape[0] * shape[1], dtype='bool')
+            found[present] = True
+            found = found.reshape(shape)
+
+            new_data[rows] = row_keys
+            for i, col in enumerate(col_keys):
+                new_vals = table[:, i]
+                if not found[:, i].all():
+                    # missing combinations are NaN
+                    dtype = 'O' if new_vals.dtype.kind == 'O' else 'float'
+                    new_vals = new_vals.astype(dtype)
+                    new_vals[~found[:, i]] = np.nan
+                new_data[col] = new_vals
         return DataFrame(new_data)
 
-    def _add_docs(self):
-        agg_names = ['min', 'max', 'mean', 'median', 'sum', 'var',
-                     'std', 'any', 'all', 'argmax', 'argmin']
-        agg_doc = \
+    def lazy(self):
         """
-        Find the {} of each column
+        Starts a lazy query. Selections, operators, sorts and
+        aggregations on the returned LazyFrame are only recorded. They are
+        optimized together and run when `collect` is called.
 
         Returns
         -------
-        DataFrame
+        A LazyFrame
         """
-        for name in agg_names:
-            getattr(DataFrame, name).__doc__ = agg_doc.format(name)
-
+        return LazyFrame(_Scan(self))
 
-class StringMethods:
+    def groupby(self, keys):
+        """
+        Groups the rows by the distinct values of one or more columns.
+        The key columns are factorized once and the resulting group
+        index is shared by every aggregation of the returned object.
 
-    def __init__(self, df):
-        self._df = df
+        Parameters
+        ----------
+        keys: str or list of column names to group by
 
-    def capitalize(self, col):
-        return self._str_method(str.capitalize, col)
+        Returns
+        -------
+        A GroupBy object
+        """
+        return GroupBy(self, keys)
 
-    def center(self, col, width, fillchar=None):
-        if fillchar is None:
-            fillchar = ' '
-        return self._str_method(str.center, col, width, fillchar)
+    def merge(self, other, on, how='inner', suffixes=('_x', '_y'), algorithm='hash'):
+        """
+        Joins the rows of two DataFrames that have equal values in the
+        key columns. The output has the columns of this DataFrame
+        followed by the non-key columns of `other`. Its rows follow the
+        order of this DataFrame, and an outer join appends the unmatched
+        rows of `other` at the end. Columns without a matching row are
+        filled with missing values, so int and bool columns become float.
 
-    def count(self, col, sub, start=None, stop=None):
-        return self._str_method(str.count, col, sub, start, stop)
+        Parameters
+        ----------
+        other: DataFrame
+        on: str or list of the key column names found in both DataFrames
+        how: {'inner', 'left', 'outer'}
+        suffixes: tuple of two strings
+            Appended to the non-key column names found in both DataFrames
+        algorithm: {'hash', 'sort'}
+            'hash' encodes the keys of both DataFrames as shared integer
+            codes and looks up the matching rows by code. 'sort' finds
+            them by binary search and only sorts `other` if its key is
+            not sorted already. It supports a single key column and can
+            be faster for numeric keys that are already sorted.
 
-    def endswith(self, col, suffix, start=None, stop=None):
-        return self._str_method(str.endswith, col, suffix, start, stop)
+        Returns
+        -------
+        A DataFrame
+        """
+        if not isinstance(other, DataFrame):
+            raise TypeError('`other` must be a DataFrame')
+        if isinstance(on, str):
+            on = [on]
+        if not isinstance(on, list) or not on:
+            raise TypeError('`on` must be a column name or a non-empty list of column names')
+        for key in on:
+            if key not in self._data or key not in other._data:
+                raise KeyError(f'{key} is not a column of both DataFrames')
+        if how not in ('inner', 'left', 'outer'):
+            raise ValueError("`how` must be 'inner', 'left' or 'outer'")
+        if algorithm not in ('hash', 'sort'):
+            raise ValueError("`algorithm` must be 'hash' or 'sort'")
+        if algorithm == 'sort' and len(on) > 1:
+            raise ValueError("`algorithm` 'sort' only supports a single key column")
+
+        outer = how == 'outer'
+        if algorithm == 'hash':
+            starts, matches, order, right_unmatched = _hash_join(self, other, on, outer)
+        else:
+            starts, matches, order, right_unmatched = _sort_join(self._data[on[0]],
+                                                                 other._data[on[0]], outer)
+        left_rows, right_rows = _join_rows(starts, matches, order, how == 'inner')
+        n_matched = len(left_rows)
+        left_rows = np.concatenate([left_rows, np.full(len(right_unmatched), -1)])
+        right_rows = np.concatenate([right_rows, right_unmatched])
+
+        left_cols = [col for col in self._data if col not in on]
+        right_cols = [col for col in other._data if col not in on]
+        overlap = set(left_cols) & set(right_cols)
+        names = ([col + suffixes[0] if col in overlap else col for col in self._data]
+                 + [col + suffixes[1] if col in overlap else col for col in right_cols])
+        if len(set(names)) != len(names):
+            raise ValueError('The merged column names are not unique')
+
+        def gather(item):
+            side, col = item
+            if side == 'left' and col in on and len(right_unmatched):
+                # the keys of the unmatched rows of other come from other
+                return _concat_columns([_take_missing(self._data[col], left_rows[:n_matched]),
+                                        _take_missing(other._data[col], right_unmatched)])
+            if side == 'left':
+                return _take_missing(self._data[col], left_rows)
+            return _take_missing(other._data[col], right_rows)
+
+        items = [('left', col) for col in self._data] + [('right', col) for col in right_cols]
+        new_data = dict(zip(names, _map_columns(gather, items)))
+        return DataFrame._from_trusted(new_data, owned=new_data)
+
+    def to_csv(self, path, chunksize=100000):
+        """
+        Writes the DataFrame to a comma-separated value file
 
-    def startswith(self, col, suffix, start=None, stop=None):
-        return self._str_method(str.startswith, col, suffix, start, stop)
+        Each column is formatted to bytes with a single vectorized call
+        per data type. The fields of a chunk of rows are copied next to
+        each other into one buffer and written as a single block. Missing
+        values are written as an empty field for strings and as nan for
+        floats. A ValueError is raised for strings containing a comma or
+        a newline, which cannot be read back.
 
-    def find(self, col, sub, start=None, stop=None):
-        return self._str_method(str.find, col, sub, start, stop)
+        Parameters
+        ----------
+        path: string of file location
+        chunksize: int
+            Number of rows formatted and written at a time
+
+        Returns
+        -------
+        None
+        """
+        if not isinstance(chunksize, int) or chunksize < 1:
+            raise ValueError('`chunksize` must be a positive integer')
+
+        with open(path, 'wb') as f:
+            f.write((','.join(self.columns) + '\n').encode('utf-8'))
+            for start in range(0, len(self), chunksize):
+                stop = start + chunksize
+                fields = [_format_csv_fields(values[start:stop])
+                          for values in self._data.values()]
+                # every field is followed by a comma, the last of a row by a newline
+                lengths = np.column_stack([field_lengths for _, _, field_lengths in fields])
+                ends = np.cumsum(lengths + 1).reshape(lengths.shape)
+                block = np.full(ends[-1, -1], _CSV_COMMA, dtype=np.uint8)
+                block[ends[:, -1] - 1] = _CSV_NEWLINE
+                for (col, values), (buf, starts, _), n_bytes, stops in zip(
+                        self._data.items(), fields, lengths.T, ends.T):
+                    chunk = buf[_segment_positions(starts, n_bytes)]
+                    if values.dtype.kind == 'O' and \
+                            ((chunk == _CSV_COMMA) | (chunk == _CSV_NEWLINE)).any():
+                        raise ValueError(f'Column {col!r} contains a comma or newline, which '
+                                         'cannot be written to a CSV file')
+                    block[_segment_positions(stops - 1 - n_bytes, n_bytes)] = chunk
+                f.write(block.tobytes())
+
+    def to_binary(self, path):
+        """
+        Writes the DataFrame to a binary columnar file that can be read
+        back with `read_binary`
+
+        Each column is stored as a raw contiguous buffer after a small
+        JSON header of column names, data types and buffer locations.
+        String columns are stored as one buffer of UTF-8 bytes, an array
+        of offsets into it and a bitmap marking which values are not None.
+
+        Parameters
+        ----------
+        path: string of file location
+
+        Returns
+        -------
+        None
+        """
+        import json
+
+        columns = []
+        buffers = []
+        position = 0
+        for col, values in self._data.items():
+            column = {'name': col}
+            if isinstance(values, Categorical):
+                col_buffers = _encode_strings(values.categories)
+                col_buffers['codes'] = values.codes
+                column['dtype'] = 'category'
+                column['codes_dtype'] = values.codes.dtype.str
+                column['ncategories'] = len(values.categories)
+            elif isinstance(values, StringArray):
+                col_buffers = values._buffers()
+                column['dtype'] = 'string'
+            elif values.dtype.kind == 'O':
+                col_buffers = _encode_strings(values)
+                column['dtype'] = 'string'
+            else:
+                col_buffers = {'values': np.ascontiguousarray(values)}
+                column['dtype'] = values.dtype.str
+            locations = {}
+            for name, buffer in col_buffers.items():
+                position += -position % _BINARY_ALIGNMENT
+                locations[name] = [position, buffer.nbytes]
+                buffers.append((position, buffer))
+                position += buffer.nbytes
+            column['buffers'] = locations
+            columns.append(column)
+
+        header = json.dumps({'nrows': len(self), 'columns': columns}).encode('utf-8')
+        start = len(_BINARY_MAGIC) + 8 + len(header)
+        start += -start % _BINARY_ALIGNMENT
+        with open(path, 'wb') as f:
+            f.write(_BINARY_MAGIC)
+            f.write(np.uint64(len(header)).tobytes())
+            f.write(header)
+            for position, buffer in buffers:
+                f.write(b'\0' * (start + position - f.tell()))
+                # written straight from the array, copied only if not contiguous
+                f.write(memoryview(np.ascontiguousarray(buffer)))
+
+
+def _add_docs():
+    # the aggregation methods share one docstring, set once at import
+    agg_names = ['min', 'max', 'mean', 'median', 'sum', 'var',
+                 'std', 'any', 'all', 'argmax', 'argmin']
+    agg_doc = \
+        """
+        Find the {} of each column
+
+        Parameters
+        ----------
+        skipna: bool
+            If True, missing values (NaN and None) are ignored
+
+        Returns
+        -------
+        DataFrame
+        """
+    for name in agg_names:
+        getattr(DataFrame, name).__doc__ = agg_doc.format(name)
+
+
+_add_docs()
+
+
+_OPTIONS = {'threads': 1}
+
+# the number of set bits of every byte value
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype='int')
+
+# the thread pool shared by every DataFrame and the number of its threads
+_EXECUTOR = None
+_EXECUTOR_THREADS = 0
+
+# marks a column that an aggregation leaves out
+_SKIP = object()
+
+
+def set_option(name, value):
+    """
+    Sets a global option
+
+    Options
+    -------
+    threads: int
+        The number of threads used to process the columns of a DataFrame
+        in parallel in aggregations, element-wise methods and operators.
+        NumPy releases the GIL in most of its functions, so columns are
+        processed at the same time. Defaults to 1, which processes the
+        columns one after another.
+
+    Parameters
+    ----------
+    name: str of option name
+    value: new value of the option
+
+    Returns
+    -------
+    None
+    """
+    if name not in _OPTIONS:
+        raise KeyError(f'{name} is not an option')
+    if name == 'threads':
+        if not isinstance(value, int) or value < 1:
+            raise ValueError('`threads` must be a positive integer')
+    _OPTIONS[name] = value
+
+
+def get_option(name):
+    """
+    Returns the current value of a global option. See `set_option`.
+
+    Parameters
+    ----------
+    name: str of option name
+
+    Returns
+    -------
+    The value of the option
+    """
+    if name not in _OPTIONS:
+        raise KeyError(f'{name} is not an option')
+    return _OPTIONS[name]
+
+
+class option_context:
+
+    def __init__(self, name, value):
+        """
+        Sets a global option inside a `with` block and restores its
+        previous value afterwards
+
+        >>> with pdc.option_context('threads', 4):
+        ...     df.std()
+
+        Parameters
+        ----------
+        name: str of option name
+        value: value of the option inside the block
+        """
+        self.name = name
+        self.value = value
+
+    def __enter__(self):
+        self.old_value = get_option(self.name)
+        set_option(self.name, self.value)
+
+    def __exit__(self, *exc_info):
+        set_option(self.name, self.old_value)
+
+
+def _map_columns(func, columns):
+    """
+    Applies a function to every column, in the shared thread pool when
+    the 'threads' option is greater than 1
+
+    Returns
+    -------
+    A list of the results in the order of the columns
+    """
+    global _EXECUTOR, _EXECUTOR_THREADS
+
+    columns = list(columns)
+    threads = _OPTIONS['threads']
+    if threads == 1 or len(columns) < 2:
+        return [func(values) for values in columns]
+    if _EXECUTOR_THREADS != threads:
+        from concurrent.futures import ThreadPoolExecutor
+
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown(wait=False)
+        _EXECUTOR = ThreadPoolExecutor(threads, thread_name_prefix='pandas_cub')
+        _EXECUTOR_THREADS = threads
+    return list(_EXECUTOR.map(func, columns))
+
+
+def _skipna_reduce(values, valid, aggfunc):
+    """
+    Applies a NumPy aggregation function to only the valid values of a
+    column. Float columns are reduced in place with a `where` mask
+    instead of a copy of their valid values.
+
+    Parameters
+    ----------
+    values: 1-D array, Categorical or StringArray
+    valid: 1-D bool array of the valid values
+    aggfunc: NumPy aggregation function
+
+    Returns
+    -------
+    A single value
+    """
+    if not valid.any():
+        if aggfunc in (np.sum, np.all, np.any):
+            return aggfunc(values[:0])
+        return np.nan if values.dtype.kind == 'f' else None
+
+    positional = aggfunc in (np.argmin, np.argmax)
+    if isinstance(values, Categorical):
+        reduced = Categorical(values.codes[valid], values.categories)._reduce(aggfunc)
+    elif values.dtype.kind == 'f':
+        if aggfunc in (np.sum, np.mean, np.var, np.std, np.all, np.any):
+            return aggfunc(values, where=valid)
+        # fmin and fmax return the other operand when one is NaN
+        if aggfunc in (np.min, np.argmin):
+            extreme = np.fmin.reduce(values)
+        elif aggfunc in (np.max, np.argmax):
+            extreme = np.fmax.reduce(values)
+        else:
+            return aggfunc(values[valid])
+        # NaN never equals the extreme, so the first match is a valid value
+        return np.argmax(values == extreme) if positional else extreme
+    else:
+        reduced = aggfunc(np.asarray(values)[valid])
+    return np.flatnonzero(valid)[reduced] if positional else reduced
+
+
+# NumPy functions that reduce a column to a single value, usable by name in agg
+_AGG_FUNCS = {'min', 'max', 'mean', 'median', 'sum', 'prod', 'var', 'std', 'all', 'any',
+              'argmin', 'argmax', 'ptp', 'count_nonzero', 'nanmin', 'nanmax', 'nanmean',
+              'nanmedian', 'nansum', 'nanprod', 'nanvar', 'nanstd', 'nanargmin', 'nanargmax'}
+
+
+def _is_percentile(name):
+    # percentiles are named like '25%'
+    return name.endswith('%') and name[:-1].replace('.', '', 1).isdigit()
+
+
+def _column_stats(values, valid, aggfuncs):
+    """
+    Computes the statistics named in `aggfuncs` for the valid values of
+    one column, sharing the passes over the data between them. The
+    results are the same as calling each NumPy function on the valid
+    values and `DataFrame.count`.
+
+    Parameters
+    ----------
+    values: 1-D array, Categorical or StringArray
+    valid: 1-D bool array of the valid values, or None if all are valid
+    aggfuncs: list of statistic names
+
+    Returns
+    -------
+    A list with one value per statistic
+    """
+    positions = None
+    if valid is not None:
+        # argmin and argmax are positions in the whole column
+        positions = np.flatnonzero(valid)
+        values = values[valid]
+    n = len(values)
+    if n == 0:
+        return [0 if name == 'count' else np.nan for name in aggfuncs]
+
+    shared = {'count': n}
+    if isinstance(values, (Categorical, StringArray)) or values.dtype.kind not in 'bif':
+        for name in aggfuncs:
+            if _is_percentile(name):
+                shared[name] = np.percentile(values, float(name[:-1]))
+            elif name == 'count':
+                continue
+            elif isinstance(values, (Categorical, StringArray)):
+                shared[name] = values._reduce(getattr(np, name))
+            else:
+                shared[name] = getattr(np, name)(values)
+    else:
+        if {'sum', 'mean', 'var', 'std'} & set(aggfuncs):
+            shared['sum'], shared['mean'], shared['var'] = _moments(values)
+            shared['std'] = np.sqrt(shared['var'])
+        percentiles = [name for name in aggfuncs if _is_percentile(name)]
+        if percentiles:
+            # the minimum and maximum are the 0 and 100 percentiles of the same partition
+            extremes = [name for name in ('min', 'max') if name in aggfuncs]
+            qs = [float(name[:-1]) for name in percentiles] + [0 if name == 'min' else 100
+                                                               for name in extremes]
+            results = np.percentile(values, qs)
+            shared.update(zip(percentiles, results))
+            shared.update((name, values.dtype.type(result))
+                          for name, result in zip(extremes, results[len(percentiles):]))
+
+    results = []
+    for name in aggfuncs:
+        if name not in shared:
+            shared[name] = getattr(np, name)(values)
+        result = shared[name]
+        if positions is not None and name in ('argmin', 'argmax', 'nanargmin', 'nanargmax'):
+            result = positions[result]
+        results.append(result)
+    return results
+
+
+# rows whose moments are computed at a time by `_moments`, small enough
+# for a block and its deviations to stay in cache
+_MOMENTS_BLOCK_SIZE = 65536
+
+
+def _moments(values):
+    """
+    Computes the sum, mean and variance of a numeric column in one pass
+    over memory. The sum and squared deviations of each block are found
+    while it is in cache, and the blocks are combined with the pairwise
+    update of Chan et al., which keeps the accuracy of two passes.
+
+    Returns
+    -------
+    A tuple of the sum, mean and variance
+    """
+    total = m2 = 0
+    count = 0
+    for start in range(0, len(values), _MOMENTS_BLOCK_SIZE):
+        block = values[start:start + _MOMENTS_BLOCK_SIZE]
+        block_sum = block.sum()
+        block_mean = block_sum / len(block)
+        deviations = block - block_mean
+        block_m2 = np.dot(deviations, deviations)
+        if count:
+            delta = block_mean - total / count
+            block_m2 += delta * delta * count * len(block) / (count + len(block))
+        total += block_sum
+        m2 += block_m2
+        count += len(block)
+    return total, total / count, m2 / count
+
+
+def _check_row_array(rows):
+    # NumPy arrays select rows when they hold integer positions or a mask
+    if rows.ndim != 1 or rows.dtype.kind not in 'biu':
+        raise TypeError('Row selection arrays must be 1-D arrays of integers or booleans')
+    return rows
+
+
+# rows evaluated at a time by DataFrame.query
+_QUERY_BLOCK_SIZE = 65536
+
+# operator node types allowed in queries mapped to their functions, see `_query_operators`
+_QUERY_OPERATORS = None
+
+
+def _query_operators():
+    # built on the first query
+    global _QUERY_OPERATORS
+    if _QUERY_OPERATORS is None:
+        import ast
+        import operator
+
+        _QUERY_OPERATORS = {
+            ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+            ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+            ast.Pow: operator.pow, ast.BitAnd: operator.and_, ast.BitOr: operator.or_,
+            ast.BitXor: operator.xor, ast.Gt: operator.gt, ast.Lt: operator.lt,
+            ast.GtE: operator.ge, ast.LtE: operator.le, ast.Eq: operator.eq,
+            ast.NotEq: operator.ne, ast.USub: operator.neg, ast.UAdd: operator.pos,
+            ast.Invert: operator.invert,
+        }
+    return _QUERY_OPERATORS
+
+
+def _parse_query(expr, data):
+    """
+    Parses a query expression and checks that it only uses the allowed
+    syntax and existing columns
+
+    Returns
+    -------
+    A tuple of the parsed expression and the list of columns it uses
+    """
+    import ast
+
+    allowed = (ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not,
+               ast.Compare, ast.In, ast.NotIn, ast.BinOp, ast.Name, ast.Load,
+               ast.Constant, ast.List, ast.Tuple) + tuple(_query_operators())
+    try:
+        tree = ast.parse(expr.strip(), mode='eval')
+    except SyntaxError:
+        raise ValueError(f'`expr` is not a valid expression: {expr!r}')
+    used = []
+    for node in ast.walk(tree):
+        if not isinstance(node, allowed):
+            raise ValueError(f'`expr` cannot contain {type(node).__name__} expressions')
+        if isinstance(node, ast.Name):
+            if node.id not in data:
+                raise KeyError(f'{node.id} is not a column')
+            if node.id not in used:
+                used.append(node.id)
+        if isinstance(node, (ast.List, ast.Tuple)):
+            if not all(isinstance(elt, ast.Constant) for elt in node.elts):
+                raise ValueError('Lists in `expr` can only contain constants')
+    return tree, used
+
+
+def _eval_query(node, block, n):
+    """
+    Evaluates a parsed query expression on a block of n rows
+
+    Parameters
+    ----------
+    node: ast node from `_parse_query`
+    block: dict of the used columns sliced to the block
+
+    Returns
+    -------
+    An array or a scalar
+    """
+    import ast
+
+    if isinstance(node, ast.Expression):
+        return _query_mask(_eval_query(node.body, block, n), n)
+    if isinstance(node, ast.Name):
+        return block[node.id]
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [elt.value for elt in node.elts]
+    if isinstance(node, ast.BoolOp):
+        is_and = isinstance(node.op, ast.And)
+        result = _query_mask(_eval_query(node.values[0], block, n), n).copy()
+        for value in node.values[1:]:
+            # only rows that are still True for `and` or False for `or` can change
+            n_undecided = np.count_nonzero(result)
+            if not is_and:
+                n_undecided = n - n_undecided
+            if not n_undecided:
+                break
+            names = {sub.id for sub in ast.walk(value) if isinstance(sub, ast.Name)}
+            if 2 * n_undecided <= n and any(block[col].dtype.kind == 'O'
+                                            and not isinstance(block[col], Categorical)
+                                            for col in names):
+                # strings are compared one Python object at a time, so
+                # only the undecided rows are gathered and compared
+                undecided = np.flatnonzero(result if is_and else ~result)
+                rows = {col: block[col][undecided] for col in names}
+                result[undecided] = _query_mask(_eval_query(value, rows, n_undecided), n_undecided)
+            else:
+                other = _query_mask(_eval_query(value, block, n), n)
+                (np.logical_and if is_and else np.logical_or)(result, other, out=result)
+        return result
+    if isinstance(node, ast.UnaryOp):
+        operand = _eval_query(node.operand, block, n)
+        if isinstance(node.op, ast.Not):
+            return np.logical_not(_query_mask(operand, n))
+        return _query_operators()[type(node.op)](_query_values(operand))
+    if isinstance(node, ast.BinOp):
+        left = _query_values(_eval_query(node.left, block, n))
+        right = _query_values(_eval_query(node.right, block, n))
+        return _query_operators()[type(node.op)](left, right)
+
+    # comparisons, where a < b < c means (a < b) & (b < c)
+    result = None
+    left = _eval_query(node.left, block, n)
+    for op, comparator in zip(node.ops, node.comparators):
+        right = _eval_query(comparator, block, n)
+        if isinstance(op, (ast.In, ast.NotIn)):
+            if not isinstance(right, list):
+                raise ValueError('`in` must be followed by a list of constants')
+            current = np.isin(np.asarray(left), right, invert=isinstance(op, ast.NotIn))
+        else:
+            current = _query_operators()[type(op)](left, right)
+        current = _query_mask(current, n)
+        result = current if result is None else result & current
+        left = right
+    return result
+
+
+def _query_values(values):
+    # encoded strings take part in arithmetic as object arrays
+    if isinstance(values, (Categorical, StringArray)):
+        return np.asarray(values)
+    return values
+
+
+def _query_mask(values, n):
+    # a boolean array of the rows of the block
+    values = _query_values(values)
+    if np.ndim(values) == 0:
+        if not isinstance(values, (bool, np.bool_)):
+            raise TypeError('`expr` must evaluate to booleans')
+        return np.full(n, values)
+    if values.dtype.kind != 'b':
+        raise TypeError('`expr` must evaluate to booleans')
+    return values
+
+
+_INPLACE_UFUNCS = {'__add__': np.add, '__sub__': np.subtract, '__mul__': np.multiply,
+                   '__truediv__': np.true_divide, '__floordiv__': np.floor_divide,
+                   '__pow__': np.power}
 
-    def len(self, col):
-        return self._str_method(str.__len__, col)
+
+def _apply_oper(values, op, other):
+    # applies an operator special method to a single column
+    if isinstance(values, (Categorical, StringArray)) and op not in ('__eq__', '__ne__'):
+        values = np.asarray(values)
+    return getattr(values, op)(other)
+
+
+class StringMethods:
+
+    def __init__(self, df):
+        self._df = df
+
+    def capitalize(self, col):
+        return self._str_method(str.capitalize, col)
+
+    def center(self, col, width, fillchar=None):
+        if fillchar is None:
+            fillchar = ' '
+        return self._str_method(str.center, col, width, fillchar)
+
+    def count(self, col, sub, start=None, stop=None):
+        return self._str_method(str.count, col, sub, start, stop)
+
+    def endswith(self, col, suffix, start=None, stop=None):
+        return self._str_method(str.endswith, col, suffix, start, stop)
+
+    def startswith(self, col, suffix, start=None, stop=None):
+        return self._str_method(str.startswith, col, suffix, start, stop)
+
+    def find(self, col, sub, start=None, stop=None):
+        return self._str_method(str.find, col, sub, start, stop)
+
+    def len(self, col):
+        return self._str_method(str.__len__, col)
 
     def get(self, col, item):
         return self._str_method(str.__getitem__, col, item)
@@ -1057,48 +2174,2250 @@ class StringMethods:
         return self._str_method(str.encode, col, encoding, errors)
 
     def _str_method(self, method, col, *args):
+        """
+        Applies a `str` method to every string of a column. None values
+        stay None.
+
+        The method runs once per distinct string when the column is a
+        Categorical or when its first rows repeat often. Otherwise it is
+        called once per row through `map`, which avoids a Python loop but
+        not the call itself. `np.char` is not faster here: it also calls
+        the `str` method per string, after copying the column into a
+        fixed-width array. String results of a StringArray column are
+        stored as a StringArray again.
+        """
         old_values = self._df._data[col]
         if old_values.dtype.kind != 'O':
             raise TypeError('The `str` accessor only works with string columns')
-        new_values = []
-        for val in old_values:
-            if val is None:
-                new_values.append(val)
-            else:
-                new_val = method(val, *args)
-                new_values.append(new_val)
-        arr = np.array(new_values)
-        return DataFrame({col: arr})
+        if isinstance(old_values, StringArray):
+            arr = _str_method_values(method, np.asarray(old_values), args)
+            if arr.dtype.kind == 'O':
+                try:
+                    arr = StringArray.from_array(arr)
+                except TypeError:
+                    pass
+            return DataFrame._from_trusted({col: arr})
+        return DataFrame._from_trusted({col: _str_method_values(method, old_values, args)})
+
+
+def _str_method_values(method, values, args):
+    # applies a str method to an object array or Categorical of strings
+    if isinstance(values, Categorical):
+        codes = values.codes
+        uniques = np.append(values.categories, None)
+    else:
+        items = values.tolist()
+        sample = items[:_STR_SAMPLE_SIZE]
+        if not _is_low_cardinality(len(set(sample)), len(sample)):
+            return _apply_str_method(method, values, args)
+        uniques = list(dict.fromkeys(items))
+        positions = dict(zip(uniques, range(len(uniques))))
+        codes = np.fromiter(map(positions.__getitem__, items), dtype='int', count=len(items))
+        uniques = np.array(uniques, dtype='O')
+    return _apply_str_method(method, uniques, args)[codes]
+
+
+# rows used to decide whether a string method is applied per distinct value
+_STR_SAMPLE_SIZE = 1024
+
+
+def _apply_str_method(method, values, args):
+    """
+    Calls `method(value, *args)` for each value of an object array of
+    strings, keeping None values as None.
 
+    Returns
+    -------
+    A 1-D array. Strings are returned as an object array
+    """
+    from itertools import repeat
+
+    missing = values == None
+    has_missing = missing.any()
+    if has_missing:
+        values = values[~missing]
+    results = list(map(method, values.tolist(), *[repeat(arg) for arg in args]))
+    if results and isinstance(results[0], str):
+        arr = np.array(results, dtype='O')
+    else:
+        arr = np.array(results)
+    if has_missing:
+        # an empty object array is filled with None
+        full = np.empty(len(missing), dtype='O')
+        full[~missing] = arr
+        arr = full
+    return arr
+
+
+def _shifted_output(n_rows, n):
+    """
+    Prepares the output of a shift by n rows. The rows that have no
+    value n rows away are already NaN.
 
-def read_csv(fn):
+    Returns
+    -------
+    A tuple of the float output array, the slice of rows that receive a
+    value and the slice of rows the values come from
     """
-    Read in a comma-separated value file as a DataFrame
+    out = np.empty(n_rows)
+    n = max(-n_rows, min(n, n_rows))
+    if n >= 0:
+        current, previous = slice(n, None), slice(None, n_rows - n)
+        out[:n] = np.nan
+    else:
+        current, previous = slice(None, n), slice(-n, None)
+        out[n:] = np.nan
+    return out, current, previous
+
+
+class Rolling:
+
+    def __init__(self, df, window):
+        """
+        Moving-window calculations on the bool, int and float columns of
+        a DataFrame. Create it with `DataFrame.rolling` or
+        `DataFrame.expanding`. Other columns are returned unchanged.
+
+        Every calculation takes time proportional to the number of rows,
+        whatever the window size. Sums, means, variances and standard
+        deviations subtract prefix sums. Minimums and maximums combine
+        running extremes within blocks of `window` rows.
+
+        Parameters
+        ----------
+        df: DataFrame
+        window: int, or None for an expanding window
+        """
+        self._df = df
+        self._window = window
+
+    def sum(self):
+        return self._df._non_agg(_rolling_sum, window=self._window)
+
+    def mean(self):
+        return self._df._non_agg(_rolling_mean, window=self._window)
+
+    def var(self):
+        return self._df._non_agg(_rolling_var, window=self._window)
+
+    def std(self):
+        return self._df._non_agg(_rolling_std, window=self._window)
+
+    def min(self):
+        return self._df._non_agg(_rolling_extreme, window=self._window, ufunc=np.minimum)
+
+    def max(self):
+        return self._df._non_agg(_rolling_extreme, window=self._window, ufunc=np.maximum)
+
+
+def _window_reduce(values, window, ufunc):
+    """
+    Combines every full window of float values with `np.add`,
+    `np.minimum` or `np.maximum` using the van Herk / Gil-Werman method.
+    The rows are cut into blocks of `window` rows, so every window covers
+    the end of one block and the start of the next. Its result combines
+    an accumulation taken backwards from the end of the first block with
+    one taken forwards from the start of the second. Each accumulation
+    spans at most one block, so sums keep the precision of a direct sum.
 
     Parameters
     ----------
-    fn: string of file location
+    values: 1-D float array
+    window: int
+    ufunc: np.add, np.minimum or np.maximum
 
     Returns
     -------
-    A DataFrame
+    A float array that is NaN before the first full window
     """
-    from collections import defaultdict
-    values = defaultdict(list)
-    with open(fn) as f:
-        header = f.readline()
-        column_names = header.strip('\n').split(',')
-        for line in f:
-            vals = line.strip('\n').split(',')
-            for val, name in zip(vals, column_names):
-                values[name].append(val)
-    new_data = {}
-    for col, vals in values.items():
-        try:
-            new_data[col] = np.array(vals, dtype='int')
-        except ValueError:
-            try:
-                new_data[col] = np.array(vals, dtype='float')
-            except ValueError:
-                new_data[col] = np.array(vals, dtype='O')
-    return DataFrame(new_data)
+    n = len(values)
+    result = np.full(n, np.nan)
+    if window > n:
+        return result
+    n_blocks = -(-n // window)
+    blocks = np.zeros(n_blocks * window)
+    blocks[:n] = values
+    blocks = blocks.reshape(n_blocks, window)
+    forward = ufunc.accumulate(blocks, axis=1).ravel()
+    backward = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    # the window ending at row i starts at row i - window + 1
+    result[window - 1:] = ufunc(backward[:n - window + 1], forward[window - 1:n])
+    if ufunc is np.add:
+        # windows that start a block lie entirely inside it
+        result[window - 1::window] = backward[:n - window + 1:window]
+    return result
+
+
+def _window_sums(values, window):
+    """
+    Sums every window. Windows that are not full yet or that hold a NaN
+    are NaN. `window` is None for expanding windows.
+
+    Returns
+    -------
+    A tuple of the float sums and the number of values in each window
+    """
+    values = values.astype('float')
+    missing = np.isnan(values)
+    has_missing = missing.any()
+    if has_missing:
+        values[missing] = 0
+    if window is None:
+        sums = np.cumsum(values)
+        counts = np.arange(1, len(values) + 1, dtype='float')
+        if has_missing:
+            sums[np.cumsum(missing) > 0] = np.nan
+    else:
+        sums = _window_reduce(values, window, np.add)
+        counts = np.full(len(values), float(window))
+        if has_missing:
+            sums[_window_reduce(missing, window, np.add) > 0] = np.nan
+    return sums, counts
+
+
+def _rolling_sum(values, window):
+    return _window_sums(values, window)[0]
+
+
+def _rolling_mean(values, window):
+    sums, counts = _window_sums(values, window)
+    return sums / counts
+
+
+def _rolling_var(values, window):
+    # centering on the overall mean keeps the difference of the sums accurate
+    values = values.astype('float')
+    if len(values) and not np.isnan(values).all():
+        values -= np.nanmean(values)
+    sums, counts = _window_sums(values, window)
+    squares, _ = _window_sums(values ** 2, window)
+    return np.maximum(squares / counts - (sums / counts) ** 2, 0)
+
+
+def _rolling_std(values, window):
+    return np.sqrt(_rolling_var(values, window))
+
+
+def _rolling_extreme(values, window, ufunc):
+    values = values.astype('float')
+    if window is None:
+        return ufunc.accumulate(values)
+    return _window_reduce(values, window, ufunc)
+
+
+class GroupBy:
+
+    def __init__(self, df, keys):
+        """
+        The rows of a DataFrame grouped by one or more key columns.
+        Create it with `DataFrame.groupby`.
+
+        Parameters
+        ----------
+        df: DataFrame
+        keys: str or list of column names to group by
+        """
+        if isinstance(keys, str):
+            keys = [keys]
+        if not isinstance(keys, list) or not keys:
+            raise TypeError('`keys` must be a column name or a non-empty list of column names')
+        for key in keys:
+            if key not in df._data:
+                raise KeyError(f'{key} is not a column')
+        if len(set(keys)) != len(keys):
+            raise ValueError('`keys` must not contain duplicates')
+
+        # the columns are shared with `df`, which copies them before any
+        # later change, so the groups keep the values they were built from
+        self._data = dict(df._data)
+        df._release()
+        self._keys = keys
+
+        # combine the codes of each key one at a time, renumbering after
+        # every step so that the combined codes never overflow
+        codes = np.zeros(len(df), dtype='int')
+        for key in keys:
+            key_codes, uniques = _factorize(df._data[key])
+            codes = codes * len(uniques) + key_codes
+            _, first, codes = np.unique(codes, return_index=True, return_inverse=True)
+        self._codes = codes
+        self._n_groups = len(first)
+        self._first = first
+        self._counts = np.bincount(codes, minlength=self._n_groups)
+        self._order = None
+
+    def __len__(self):
+        return self._n_groups
+
+    def _key_data(self):
+        return {key: self._data[key][self._first] for key in self._keys}
+
+    def size(self):
+        """
+        Counts the rows of each group
+
+        Returns
+        -------
+        A DataFrame with the key columns and a 'size' column
+        """
+        new_data = self._key_data()
+        new_data['size'] = self._counts
+        return DataFrame(new_data)
+
+    def agg(self, aggs):
+        """
+        Aggregates any number of columns with any number of functions
+        using the same group index. The result has one row per group in
+        sorted key order. Each aggregated column is named
+        '{column}_{aggfunc}'.
+
+        Parameters
+        ----------
+        aggs: dict
+            Maps column names to the name of a NumPy aggregation
+            function or to a list of such names, e.g.
+            {'salary': ['mean', 'max'], 'race': 'size'}
+
+        Returns
+        -------
+        A DataFrame
+        """
+        if not isinstance(aggs, dict):
+            raise TypeError('`aggs` must be a dictionary of column names mapped to '
+                            'aggregation functions')
+
+        new_data = self._key_data()
+        for col, funcs in aggs.items():
+            if col not in self._data:
+                raise KeyError(f'{col} is not a column')
+            if isinstance(funcs, str):
+                funcs = [funcs]
+            values = self._data[col]
+            for func in funcs:
+                if not isinstance(func, str):
+                    raise TypeError('Each aggregation function must be a string')
+                if func != 'size' and func not in _AGG_FUNCS:
+                    raise ValueError(f'{func} is not a supported aggregation function')
+                if func not in ('size', 'sum', 'mean', 'var', 'std') and self._order is None:
+                    self._order = np.argsort(self._codes, kind='stable')
+                new_data[f'{col}_{func}'] = _group_reduce(values, self._codes, self._n_groups, func,
+                                                          counts=self._counts, order=self._order)
+        return DataFrame(new_data)
+
+
+class LazyFrame:
+
+    def __init__(self, plan):
+        """
+        A query on a DataFrame that is recorded as a logical plan instead
+        of being run. Create it with `DataFrame.lazy`. Nothing is computed
+        until `collect` is called.
+
+        Before running, the plan is optimized. Column selections are
+        pushed down so that only the needed columns are read. Row filters
+        are pushed below selections and sorts and consecutive filters are
+        fused into one mask. A sort followed by `head` becomes a top-k
+        selection.
+
+        Parameters
+        ----------
+        plan: the root node of the logical plan
+        """
+        self._plan = plan
+
+    @property
+    def columns(self):
+        """
+        Returns
+        -------
+        A list of the column names of the result
+        """
+        return list(self._plan.columns)
+
+    def __repr__(self):
+        return 'LazyFrame\n' + self._plan.explain()
+
+    def __getitem__(self, item):
+        """
+        Records a selection with the same rules as `DataFrame.__getitem__`
+
+        A single string selects one column -> lf['colname']
+        A list of strings selects multiple columns -> lf[['colname1', 'colname2']]
+        A one column boolean LazyFrame filters rows -> lf[lf['colname'] > 5]
+
+        Returns
+        -------
+        A LazyFrame
+        """
+        if isinstance(item, str):
+            item = [item]
+        if isinstance(item, list):
+            for col in item:
+                if col not in self._plan.columns:
+                    raise KeyError(f'{col} is not a column')
+            return LazyFrame(_Project(self._plan, item))
+        if isinstance(item, LazyFrame):
+            if len(item.columns) != 1:
+                raise ValueError('Can only pass a one column LazyFrame for selection')
+            term = item._plan.comparison_of(self._plan)
+            if term is not None:
+                return LazyFrame(_Filter(self._plan, [term]))
+            return LazyFrame(_MaskFilter(self._plan, item._plan))
+        raise TypeError('Select with either a string, a list, or a one column '
+                        'boolean LazyFrame')
+
+    def head(self, n=5):
+        """
+        Records the selection of the first n rows
+
+        Parameters
+        ----------
+        n: int
+
+        Returns
+        -------
+        A LazyFrame
+        """
+        if not isinstance(n, int) or n < 0:
+            raise ValueError('`n` must be a non-negative integer')
+        return LazyFrame(_Head(self._plan, n))
+
+    def sort_values(self, by, asc=True):
+        """
+        Records a sort by one or more columns
+
+        Parameters
+        ----------
+        by: str or list of column names
+        asc: boolean of sorting order
+
+        Returns
+        -------
+        A LazyFrame
+        """
+        if isinstance(by, str):
+            by = [by]
+        elif not isinstance(by, list):
+            raise TypeError('`by` must be a str or a list')
+        for col in by:
+            if col not in self._plan.columns:
+                raise KeyError(f'{col} is not a column')
+        return LazyFrame(_Sort(self._plan, by, asc))
+
+    def min(self):
+        return self._agg('min')
+
+    def max(self):
+        return self._agg('max')
+
+    def mean(self):
+        return self._agg('mean')
+
+    def median(self):
+        return self._agg('median')
+
+    def sum(self):
+        return self._agg('sum')
+
+    def var(self):
+        return self._agg('var')
+
+    def std(self):
+        return self._agg('std')
+
+    def all(self):
+        return self._agg('all')
+
+    def any(self):
+        return self._agg('any')
+
+    def argmax(self):
+        return self._agg('argmax')
+
+    def argmin(self):
+        return self._agg('argmin')
+
+    def _agg(self, aggfunc):
+        return LazyFrame(_Agg(self._plan, aggfunc))
+
+    def __add__(self, other):
+        return self._oper('__add__', other)
+
+    def __radd__(self, other):
+        return self._oper('__radd__', other)
+
+    def __sub__(self, other):
+        return self._oper('__sub__', other)
+
+    def __rsub__(self, other):
+        return self._oper('__rsub__', other)
+
+    def __mul__(self, other):
+        return self._oper('__mul__', other)
+
+    def __rmul__(self, other):
+        return self._oper('__rmul__', other)
+
+    def __truediv__(self, other):
+        return self._oper('__truediv__', other)
+
+    def __rtruediv__(self, other):
+        return self._oper('__rtruediv__', other)
+
+    def __floordiv__(self, other):
+        return self._oper('__floordiv__', other)
+
+    def __rfloordiv__(self, other):
+        return self._oper('__rfloordiv__', other)
+
+    def __pow__(self, other):
+        return self._oper('__pow__', other)
+
+    def __rpow__(self, other):
+        return self._oper('__rpow__', other)
+
+    def __gt__(self, other):
+        return self._oper('__gt__', other)
+
+    def __lt__(self, other):
+        return self._oper('__lt__', other)
+
+    def __ge__(self, other):
+        return self._oper('__ge__', other)
+
+    def __le__(self, other):
+        return self._oper('__le__', other)
+
+    def __ne__(self, other):
+        return self._oper('__ne__', other)
+
+    def __eq__(self, other):
+        return self._oper('__eq__', other)
+
+    def _oper(self, op, other):
+        if isinstance(other, LazyFrame):
+            raise TypeError('`other` cannot be a LazyFrame, collect it first')
+        return LazyFrame(_Oper(self._plan, op, other))
+
+    def optimize(self):
+        """
+        Rewrites the plan without running it
+
+        Returns
+        -------
+        A LazyFrame with the optimized plan
+        """
+        plan = _push_filters(self._plan)
+        plan = _push_heads(plan)
+        plan = plan.prune(None)
+        return LazyFrame(plan)
+
+    def explain(self, optimized=True):
+        """
+        Describes the plan that `collect` runs, one node per line with
+        the inputs of each node indented below it
+
+        Parameters
+        ----------
+        optimized: bool
+            If False, describe the plan as it was recorded
+
+        Returns
+        -------
+        A str
+        """
+        plan = self.optimize()._plan if optimized else self._plan
+        return plan.explain()
+
+    def collect(self):
+        """
+        Optimizes and runs the plan
+
+        Returns
+        -------
+        A DataFrame
+        """
+        return self.optimize()._plan.execute()
+
+
+# The logical plan nodes of a LazyFrame. Row-selecting nodes only
+# compute which rows of the scanned columns they keep (`select`), so the
+# output columns are gathered once at the end. Other nodes run eagerly
+# on the DataFrame of their input.
+
+class _Node:
+
+    child = None
+
+    def with_child(self, child):
+        node = object.__new__(type(self))
+        node.__dict__.update(self.__dict__)
+        node.child = child
+        return node
+
+    @property
+    def columns(self):
+        return self.child.columns
+
+    def explain(self, indent=0):
+        text = ' ' * indent + self.describe()
+        if self.child is not None:
+            text += '\n' + self.child.explain(indent + 2)
+        return text
+
+    def comparison_of(self, plan):
+        # the filter term (column, operator, value) that this node computes on `plan`
+        return None
+
+    def prune(self, required):
+        # drops the columns that no parent needs from the scan below
+        return self.with_child(self.child.prune(required))
+
+    def select(self):
+        """
+        Returns
+        -------
+        A tuple of a dictionary of columns and the rows of them that
+        this node outputs, which is None for all rows
+        """
+        return self.execute()._data, None
+
+    def execute(self):
+        data, rows = self.select()
+        return DataFrame._from_trusted({col: _take_rows(data[col], rows) for col in self.columns})
+
+
+class _Scan(_Node):
+
+    def __init__(self, df, selected=None, terms=()):
+        self.df = df
+        self.selected = selected
+        self.terms = list(terms)
+
+    @property
+    def columns(self):
+        return self.df.columns if self.selected is None else self.selected
+
+    def describe(self):
+        text = f'Scan columns={self.columns}'
+        if self.terms:
+            text += f' filter={_describe_terms(self.terms)}'
+        return text
+
+    def prune(self, required):
+        if required is None:
+            return self
+        return _Scan(self.df, [col for col in self.df.columns if col in required], self.terms)
+
+    def select(self):
+        # the result may share the scanned columns
+        self.df._release(self.columns)
+        data = self.df._data
+        return data, _filter_rows(data, self.terms, None)
+
+
+class _Project(_Node):
+
+    def __init__(self, child, selected):
+        self.child = child
+        self.selected = selected
+
+    @property
+    def columns(self):
+        return self.selected
+
+    def describe(self):
+        return f'Project columns={self.selected}'
+
+    def prune(self, required):
+        return self.with_child(self.child.prune(self.selected))
+
+    def select(self):
+        return self.child.select()
+
+
+class _Filter(_Node):
+
+    def __init__(self, child, terms):
+        self.child = child
+        self.terms = terms
+
+    def describe(self):
+        return f'Filter {_describe_terms(self.terms)}'
+
+    def prune(self, required):
+        return self.with_child(self.child.prune(_needing(self.child, required, self.terms)))
+
+    def select(self):
+        data, rows = self.child.select()
+        return data, _filter_rows(data, self.terms, rows)
+
+
+class _MaskFilter(_Node):
+
+    def __init__(self, child, mask):
+        self.child = child
+        self.mask = mask
+
+    def explain(self, indent=0):
+        mask = LazyFrame(self.mask).optimize()._plan
+        return (' ' * indent + 'Filter by mask\n' + mask.explain(indent + 4) + '\n'
+                + self.child.explain(indent + 2))
+
+    def execute(self):
+        return self.child.execute()[LazyFrame(self.mask).collect()]
+
+
+class _Sort(_Node):
+
+    def __init__(self, child, by, asc):
+        self.child = child
+        self.by = by
+        self.asc = asc
+
+    def describe(self):
+        return f'Sort by={self.by} asc={self.asc}'
+
+    def prune(self, required):
+        return self.with_child(self.child.prune(_needing(self.child, required, self.by)))
+
+    def select(self):
+        data, rows = self.child.select()
+        order = _sort_order([_take_rows(data[col], rows) for col in self.by], self.asc)
+        return data, _compose_rows(rows, order)
+
+
+class _Head(_Node):
+
+    def __init__(self, child, n):
+        self.child = child
+        self.n = n
+
+    def describe(self):
+        return f'Head n={self.n}'
+
+    def select(self):
+        data, rows = self.child.select()
+        if rows is None:
+            # a slice keeps the columns as views
+            n_rows = len(next(iter(data.values()))) if data else 0
+            return data, slice(0, min(self.n, n_rows))
+        return data, _compose_rows(rows, slice(None, self.n))
+
+
+class _TopK(_Node):
+
+    def __init__(self, child, by, asc, n):
+        self.child = child
+        self.by = by
+        self.asc = asc
+        self.n = n
+
+    def describe(self):
+        return f'TopK by={self.by} asc={self.asc} n={self.n}'
+
+    def prune(self, required):
+        return self.with_child(self.child.prune(_needing(self.child, required, self.by)))
+
+    def select(self):
+        data, rows = self.child.select()
+        order = _top_k_order([_take_rows(data[col], rows) for col in self.by], self.n, self.asc)
+        return data, _compose_rows(rows, order)
+
+
+class _Oper(_Node):
+
+    def __init__(self, child, op, other):
+        self.child = child
+        self.op = op
+        self.other = other
+
+    @property
+    def elementwise(self):
+        # a scalar operand keeps every row independent of the others
+        return np.ndim(self.other) == 0 and not isinstance(self.other, DataFrame)
+
+    def describe(self):
+        return f'Oper {self.op} {self.other!r}'
+
+    def comparison_of(self, plan):
+        if (self.op in _CSV_OPERATORS.values() and self.elementwise
+                and isinstance(self.child, _Project) and self.child.child is plan):
+            return self.child.selected[0], self.op, self.other
+        return None
+
+    def execute(self):
+        return self.child.execute()._oper(self.op, self.other)
+
+
+class _Agg(_Node):
+
+    def __init__(self, child, aggfunc):
+        self.child = child
+        self.aggfunc = aggfunc
+
+    def describe(self):
+        return f'Agg {self.aggfunc}'
+
+    def execute(self):
+        return getattr(self.child.execute(), self.aggfunc)()
+
+
+def _push_filters(node):
+    # moves every filter as far down the plan as possible
+    if node.child is None:
+        return node
+    child = _push_filters(node.child)
+    if isinstance(node, _Filter):
+        return _push_filter(child, node.terms)
+    return node.with_child(child)
+
+
+def _push_filter(node, terms):
+    if isinstance(node, _Scan):
+        return _Scan(node.df, node.selected, node.terms + terms)
+    if isinstance(node, _Filter):
+        # consecutive filters become a single mask
+        return _push_filter(node.child, node.terms + terms)
+    if isinstance(node, (_Project, _Sort)):
+        return node.with_child(_push_filter(node.child, terms))
+    return _Filter(node, terms)
+
+
+def _push_heads(node):
+    # moves every head below selections and merges it into a sort
+    if node.child is None:
+        return node
+    child = _push_heads(node.child)
+    if isinstance(node, _Head):
+        return _push_head(child, node.n)
+    return node.with_child(child)
+
+
+def _push_head(node, n):
+    if isinstance(node, _Project) or isinstance(node, _Oper) and node.elementwise:
+        return node.with_child(_push_head(node.child, n))
+    if isinstance(node, _Sort):
+        return _TopK(node.child, node.by, node.asc, n)
+    if isinstance(node, _TopK):
+        return _TopK(node.child, node.by, node.asc, min(n, node.n))
+    if isinstance(node, _Head):
+        return _Head(node.child, min(n, node.n))
+    return _Head(node, n)
+
+
+def _needing(child, required, used):
+    # the columns of `child` that are required above or used by a node
+    if required is None:
+        return None
+    used = {term[0] if isinstance(term, tuple) else term for term in used}
+    return [col for col in child.columns if col in required or col in used]
+
+
+def _describe_terms(terms):
+    symbols = {method: symbol for symbol, method in _CSV_OPERATORS.items()}
+    return ' and '.join(f'{col} {symbols[op]} {value!r}' for col, op, value in terms)
+
+
+def _take_rows(values, rows):
+    return values if rows is None else values[rows]
+
+
+def _compose_rows(rows, selection):
+    # the rows of the source selected by indexing `rows` with `selection`
+    if rows is None:
+        return selection
+    if isinstance(rows, slice):
+        rows = np.arange(rows.start, rows.stop)
+    return rows[selection]
+
+
+def _filter_rows(data, terms, rows):
+    """
+    Applies (column, operator, value) terms one at a time, each only to
+    the rows that passed the terms before it
+
+    Returns
+    -------
+    The selected rows, or `rows` if there are no terms
+    """
+    for col, op, value in terms:
+        mask = _apply_oper(_take_rows(data[col], rows), op, value)
+        rows = np.flatnonzero(mask) if rows is None else _compose_rows(rows, np.flatnonzero(mask))
+    return rows
+
+
+def _sort_order(keys, asc=True):
+    """
+    Finds the order of the rows sorted by one or more key columns, the
+    first key being the most significant
+
+    Returns
+    -------
+    A 1-D int array
+    """
+    if len(keys) == 1:
+        order = np.argsort(keys[0], kind='stable')
+    else:
+        keys = [key.codes if isinstance(key, Categorical) else np.asarray(key) for key in keys]
+        order = np.lexsort(keys[::-1])
+    if not asc:
+        order = order[::-1]
+    return order
+
+
+def _top_k_order(keys, n, asc=True):
+    """
+    Finds the first n rows of `_sort_order` without sorting every row.
+    When the first key is numeric without NaN, np.argpartition finds its
+    n-th value in linear time and only the rows that reach it are sorted
+    by all the keys.
+
+    Returns
+    -------
+    A 1-D int array
+    """
+    first = keys[0]
+    if (n >= len(first) or first.dtype.kind not in 'bif'
+            or first.dtype.kind == 'f' and np.isnan(first).any()):
+        return _sort_order(keys, asc)[:n]
+    if n == 0:
+        return np.empty(0, dtype='int')
+    if asc:
+        kth = first[np.argpartition(first, n - 1)[n - 1]]
+        candidates = np.flatnonzero(first <= kth)
+    else:
+        kth = first[np.argpartition(first, len(first) - n)[len(first) - n]]
+        candidates = np.flatnonzero(first >= kth)
+    # the stable sort of the candidates keeps ties in row order
+    order = _sort_order([key[candidates] for key in keys], asc)
+    return candidates[order[:n]]
+
+
+class Categorical:
+
+    def __init__(self, codes, categories):
+        """
+        A dictionary-encoded column of strings. Each value is stored as
+        a small integer code into a sorted array of its distinct strings.
+        Missing values have the code -1.
+
+        Parameters
+        ----------
+        codes: 1-D NumPy array of integers
+        categories: 1-D NumPy object array of sorted unique strings
+        """
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_array(cls, values):
+        """
+        Encodes an object array of strings and None
+
+        Parameters
+        ----------
+        values: 1-D NumPy array
+
+        Returns
+        -------
+        A Categorical
+        """
+        valid = values != None
+        inverse, categories = _factorize(values[valid])
+        codes = np.full(len(values), -1, dtype=_code_dtype(len(categories)))
+        codes[valid] = inverse
+        return cls(codes, categories.astype('O'))
+
+    @property
+    def dtype(self):
+        # the values are strings, so it behaves like an object array
+        return np.dtype('O')
+
+    @property
+    def ndim(self):
+        return 1
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.categories.nbytes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __array__(self, dtype=None, copy=None):
+        # code -1 selects the None appended to the end of the categories
+        values = np.append(self.categories, None)[self.codes]
+        if dtype is not None:
+            values = values.astype(dtype)
+        return values
+
+    def __iter__(self):
+        return iter(np.asarray(self))
+
+    def __repr__(self):
+        return f'Categorical({np.asarray(self)!r}, categories={self.categories!r})'
+
+    def __getitem__(self, item):
+        codes = self.codes[item]
+        if isinstance(codes, np.ndarray):
+            return Categorical(codes, self.categories)
+        return None if codes < 0 else self.categories[codes]
+
+    def _code_of(self, value):
+        # code of a single value or None if it is not a category
+        if value is None:
+            return -1
+        if not isinstance(value, str):
+            return None
+        i = np.searchsorted(self.categories, value)
+        if i < len(self.categories) and self.categories[i] == value:
+            return i
+        return None
+
+    def __eq__(self, other):
+        if other is None or isinstance(other, str):
+            code = self._code_of(other)
+            if code is None:
+                return np.zeros(len(self), dtype='bool')
+            return self.codes == code
+        return np.asarray(self) == other
+
+    def __ne__(self, other):
+        return ~(self == other)
+
+    def __lt__(self, other):
+        return np.asarray(self) < other
+
+    def __le__(self, other):
+        return np.asarray(self) <= other
+
+    def __gt__(self, other):
+        return np.asarray(self) > other
+
+    def __ge__(self, other):
+        return np.asarray(self) >= other
+
+    def copy(self):
+        return Categorical(self.codes.copy(), self.categories)
+
+    def astype(self, dtype):
+        return np.asarray(self).astype(dtype)
+
+    def tolist(self):
+        return np.asarray(self).tolist()
+
+    def argsort(self, axis=-1, kind=None, order=None):
+        # the categories are sorted, so the codes sort in the same order
+        return self.codes.argsort(kind=kind)
+
+    def _reduce(self, aggfunc):
+        """
+        Applies a NumPy aggregation function. Order-based aggregations
+        run on the codes when there are no missing values.
+        """
+        if len(self) and (self.codes >= 0).all():
+            if aggfunc in (np.min, np.max):
+                return self.categories[aggfunc(self.codes)]
+            if aggfunc in (np.argmin, np.argmax):
+                return aggfunc(self.codes)
+        return aggfunc(np.asarray(self))
+
+
+class StringArray:
+
+    def __init__(self, offsets, data, valid):
+        """
+        A column of strings stored in three contiguous buffers instead of
+        as Python objects. Value i is the UTF-8 decoding of
+        data[offsets[i]:offsets[i + 1]] when bit i of the validity bitmap
+        is set and None otherwise.
+
+        Parameters
+        ----------
+        offsets: 1-D int64 NumPy array with one more element than values
+        data: 1-D uint8 NumPy array of UTF-8 bytes
+        valid: 1-D uint8 NumPy array
+            Bitmap in little-endian bit order of the values that are
+            not None
+        """
+        self.offsets = offsets
+        self.data = data
+        self.valid = valid
+
+    @classmethod
+    def from_array(cls, values):
+        """
+        Encodes an object array of strings and None
+
+        Parameters
+        ----------
+        values: 1-D NumPy array
+
+        Returns
+        -------
+        A StringArray
+        """
+        return cls(**_encode_strings(np.asarray(values)))
+
+    @property
+    def dtype(self):
+        # the values are strings, so it behaves like an object array
+        return np.dtype('O')
+
+    @property
+    def ndim(self):
+        return 1
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.data.nbytes + self.valid.nbytes
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _mask(self):
+        # the validity bitmap unpacked to one bool per value
+        return np.unpackbits(self.valid, count=len(self), bitorder='little').view('bool')
+
+    def _buffers(self):
+        # the buffers with offsets starting at zero, as written to files
+        start = self.offsets[0]
+        return {'offsets': self.offsets - start,
+                'data': self.data[start:self.offsets[-1]],
+                'valid': self.valid}
+
+    def __array__(self, dtype=None, copy=None):
+        values = _decode_strings(self.offsets, self.data, self._mask())
+        if dtype is not None:
+            values = values.astype(dtype)
+        return values
+
+    def __iter__(self):
+        return iter(np.asarray(self))
+
+    def __repr__(self):
+        return f'StringArray({np.asarray(self)!r})'
+
+    def __getitem__(self, item):
+        n = len(self)
+        if isinstance(item, (int, np.integer)):
+            if not -n <= item < n:
+                raise IndexError(f'index {item} is out of bounds for size {n}')
+            item %= n
+            if not self.valid[item >> 3] >> (item & 7) & 1:
+                return None
+            return self.data[self.offsets[item]:self.offsets[item + 1]].tobytes().decode('utf-8')
+        if isinstance(item, slice) and item.step in (None, 1):
+            # contiguous rows share the offsets and data buffers
+            start, stop, _ = item.indices(n)
+            stop = max(start, stop)
+            # only the bytes of the validity bitmap that hold the rows are unpacked
+            bits = np.unpackbits(self.valid[start >> 3:(stop + 7) >> 3], bitorder='little')
+            valid = np.packbits(bits[start & 7:(start & 7) + stop - start], bitorder='little')
+            return StringArray(self.offsets[start:stop + 1], self.data, valid)
+        return self._take(np.arange(n)[item])
+
+    def _take(self, indices):
+        # gathers the bytes of every selected value with one fancy index
+        starts = self.offsets[indices]
+        lengths = self.offsets[indices + 1] - starts
+        offsets = np.zeros(len(indices) + 1, dtype='int64')
+        np.cumsum(lengths, out=offsets[1:])
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        valid = np.packbits(self._mask()[indices], bitorder='little')
+        return StringArray(offsets, self.data[positions], valid)
+
+    def __eq__(self, other):
+        if other is None:
+            return ~self._mask()
+        if isinstance(other, str):
+            # only values of the same byte length can be equal
+            encoded = np.frombuffer(other.encode('utf-8'), dtype=np.uint8)
+            lengths = np.diff(self.offsets)
+            candidates = np.flatnonzero((lengths == len(encoded)) & self._mask())
+            window = self.offsets[candidates][:, None] + np.arange(len(encoded))
+            matches = (self.data[window] == encoded).all(axis=1)
+            result = np.zeros(len(self), dtype='bool')
+            result[candidates[matches]] = True
+            return result
+        return np.asarray(self) == other
+
+    def __ne__(self, other):
+        return ~(self == other)
+
+    def __lt__(self, other):
+        return np.asarray(self) < other
+
+    def __le__(self, other):
+        return np.asarray(self) <= other
+
+    def __gt__(self, other):
+        return np.asarray(self) > other
+
+    def __ge__(self, other):
+        return np.asarray(self) >= other
+
+    def copy(self):
+        return StringArray(**{name: buffer.copy() for name, buffer in self._buffers().items()})
+
+    def astype(self, dtype):
+        return np.asarray(self).astype(dtype)
+
+    def tolist(self):
+        return np.asarray(self).tolist()
+
+    def argsort(self, axis=-1, kind=None, order=None):
+        return np.asarray(self).argsort(kind=kind)
+
+    def _reduce(self, aggfunc):
+        return aggfunc(np.asarray(self))
+
+
+def _code_dtype(n_categories):
+    # the smallest signed integer type that can hold every code and -1
+    return np.min_scalar_type(-n_categories - 1)
+
+
+def _is_low_cardinality(n_unique, n):
+    # string columns with at most one distinct value per two rows are encoded
+    return 2 * n_unique <= n
+
+
+def _concat_strings(parts):
+    """
+    Joins pieces of a string column, some of which may be Categorical.
+    The result is encoded as a Categorical by the same rule as read_csv
+    applied to the whole column.
+    """
+    values = _concat_columns(parts)
+    if isinstance(values, Categorical):
+        if _is_low_cardinality(len(values.categories), len(values)):
+            return values
+        return np.asarray(values)
+    categorical = Categorical.from_array(values)
+    if _is_low_cardinality(len(categorical.categories), len(values)):
+        return categorical
+    return values
+
+
+def _factorize(values):
+    """
+    Encodes each value as an integer code into the sorted array of its
+    distinct values. Categorical columns reuse their codes. Missing
+    strings have their own code, after every other value, so they are
+    never compared with strings.
+
+    Returns
+    -------
+    A tuple of the codes and the sorted distinct values
+    """
+    if isinstance(values, Categorical):
+        # code -1 selects the None appended to the end of the categories
+        n_categories = len(values.categories)
+        used, codes = np.unique(np.where(values.codes < 0, n_categories, values.codes),
+                                return_inverse=True)
+        return codes, np.append(values.categories, None)[used]
+    if values.dtype.kind == 'O':
+        # hash the Python objects instead of sorting all of them
+        items = values.tolist()
+        distinct = dict.fromkeys(items)
+        has_missing = distinct.pop(None, False) is None
+        uniques = np.array(sorted(distinct) + [None] * has_missing, dtype='O')
+        positions = dict(zip(uniques.tolist(), range(len(uniques))))
+        codes = np.fromiter(map(positions.__getitem__, items), dtype='int', count=len(items))
+        return codes, uniques
+    uniques, codes = np.unique(values, return_inverse=True)
+    return codes, uniques
+
+
+def _group_reduce(values, codes, n_groups, aggfunc, counts=None, order=None):
+    """
+    Aggregates the values of every group at once. Every group from 0 to
+    n_groups - 1 must have at least one value.
+
+    size, sum, mean, var and std are computed with np.bincount. Order
+    dependent aggregations sort the values by group once and reduce
+    each contiguous run with ufunc.reduceat. Any other NumPy function is
+    called once per group.
+
+    Parameters
+    ----------
+    values: 1-D array to aggregate
+    codes: 1-D int array of the group of each value
+    n_groups: int
+    aggfunc: str of the aggregation function name in NumPy
+    counts: 1-D int array of the size of each group
+        Optional. Computed from `codes` when not given
+    order: 1-D int array that stably sorts `codes`
+        Optional. Computed from `codes` when not given
+
+    Returns
+    -------
+    A 1-D array with one value per group
+    """
+    if counts is None:
+        counts = np.bincount(codes, minlength=n_groups)
+    if aggfunc == 'size':
+        return counts
+
+    kind = values.dtype.kind
+    if isinstance(values, (Categorical, StringArray)):
+        values = np.asarray(values)
+    if kind == 'f' and aggfunc == 'sum':
+        return np.bincount(codes, weights=values, minlength=n_groups)
+    if kind in 'bif' and aggfunc in ('mean', 'var', 'std'):
+        means = np.bincount(codes, weights=values, minlength=n_groups) / counts
+        if aggfunc == 'mean':
+            return means
+        deviations = values - means[codes]
+        variances = np.bincount(codes, weights=deviations ** 2, minlength=n_groups) / counts
+        return variances if aggfunc == 'var' else np.sqrt(variances)
+
+    if order is None:
+        order = np.argsort(codes, kind='stable')
+    sorted_values = values[order]
+    starts = np.zeros(n_groups, dtype='int')
+    np.cumsum(counts[:-1], out=starts[1:])
+    ufuncs = {'sum': np.add, 'min': np.minimum, 'max': np.maximum}
+    if aggfunc in ufuncs:
+        if kind == 'b' and aggfunc == 'sum':
+            sorted_values = sorted_values.astype('int')
+        return ufuncs[aggfunc].reduceat(sorted_values, starts)
+
+    func = getattr(np, aggfunc)
+    return np.array([func(group) for group in np.split(sorted_values, starts[1:])])
+
+
+def _hash_join(left, right, on, outer):
+    """
+    Encodes the keys of both DataFrames as shared integer codes and
+    groups the rows of `right` by code, so that the matching rows of
+    every row of `left` are found with array lookups. Rows with a
+    missing key match no row.
+
+    Returns
+    -------
+    A tuple of the position in `order` of the first match of each row of
+    `left`, its number of matches, the rows of `right` ordered by code
+    and, for an outer join, the rows of `right` that match no row of
+    `left`
+    """
+    n_left = len(left)
+    codes = np.zeros(n_left + len(right), dtype='int')
+    missing = np.zeros(len(codes), dtype='bool')
+    n_codes = 1
+    for key in on:
+        key_codes, n_key_codes, key_missing = _join_codes(
+            _concat_columns([left._data[key], right._data[key]]))
+        codes = codes * n_key_codes + key_codes
+        missing |= key_missing
+        n_codes *= n_key_codes
+        if n_codes > 2 * len(codes) and len(codes):
+            # renumber so that the combined codes never overflow
+            _, codes = np.unique(codes, return_inverse=True)
+            n_codes = codes.max() + 1
+    left_codes, right_codes = codes[:n_left], codes[n_left:]
+    left_missing = missing[:n_left]
+
+    right_counts = np.bincount(right_codes, minlength=n_codes)
+    code_starts = np.cumsum(right_counts) - right_counts
+    # NumPy sorts integers of 16 bits or fewer with a radix sort
+    order = np.argsort(right_codes.astype(np.min_scalar_type(n_codes)), kind='stable')
+    matches = right_counts[left_codes]
+    matches[left_missing] = 0
+    right_unmatched = np.zeros(0, dtype='int')
+    if outer:
+        left_counts = np.bincount(left_codes[~left_missing], minlength=n_codes)
+        right_unmatched = np.flatnonzero((left_counts[right_codes] == 0) | missing[n_left:])
+    return code_starts[left_codes], matches, order, right_unmatched
+
+
+def _join_codes(values):
+    """
+    Encodes a key column as integer codes for a join
+
+    Returns
+    -------
+    A tuple of the codes, the number of codes and a boolean array of
+    the missing keys
+    """
+    # integers in a compact range are their own codes, offset to start at 0
+    if values.dtype.kind in 'bi' and len(values):
+        low, high = int(values.min()), int(values.max())
+        if high - low < 2 * len(values):
+            return values.astype('int') - low, high - low + 1, np.zeros(len(values), dtype='bool')
+    codes, uniques = _factorize(values)
+    # None is the last distinct value when a key is missing
+    if len(uniques) and uniques[-1] is None:
+        missing = codes == len(uniques) - 1
+    else:
+        missing = np.zeros(len(codes), dtype='bool')
+    return codes, len(uniques), missing
+
+
+def _sort_join(left_key, right_key, outer):
+    """
+    Finds the matching rows of a single key column by binary search in
+    the sorted key of the right DataFrame. Keys that are already sorted
+    are not sorted again. Strings are searched by their shared codes,
+    where missing keys get codes that match no row.
+
+    Returns
+    -------
+    The same tuple as `_hash_join`
+    """
+    if left_key.dtype.kind == 'O' or right_key.dtype.kind == 'O':
+        codes, _, missing = _join_codes(_concat_columns([left_key, right_key]))
+        n_left = len(left_key)
+        codes[missing] = -1
+        codes[n_left:][missing[n_left:]] = -2
+        left_key, right_key = codes[:n_left], codes[n_left:]
+    left_key, right_key = np.asarray(left_key), np.asarray(right_key)
+    if np.all(right_key[1:] >= right_key[:-1]):
+        order = np.arange(len(right_key))
+    else:
+        order = np.argsort(right_key, kind='stable')
+        right_key = right_key[order]
+    starts = np.searchsorted(right_key, left_key, 'left')
+    matches = np.searchsorted(right_key, left_key, 'right') - starts
+
+    right_unmatched = np.zeros(0, dtype='int')
+    if outer:
+        if not np.all(left_key[1:] >= left_key[:-1]):
+            left_key = np.sort(left_key)
+        n_left_matches = (np.searchsorted(left_key, right_key, 'right')
+                          - np.searchsorted(left_key, right_key, 'left'))
+        right_unmatched = np.sort(order[n_left_matches == 0])
+    return starts, matches, order, right_unmatched
+
+
+def _join_rows(starts, matches, order, inner):
+    """
+    Expands the matches of every left row into pairs of row positions.
+    Unless the join is inner, left rows without a match are kept once
+    and paired with -1.
+
+    Returns
+    -------
+    A tuple of the left and right row positions
+    """
+    repeats = matches if inner else np.maximum(matches, 1)
+    left_rows = np.repeat(np.arange(len(matches)), repeats)
+    # the position of every output row within the matches of its left row
+    ends = np.cumsum(repeats)
+    within = np.arange(len(left_rows)) - np.repeat(ends - repeats, repeats)
+    positions = np.repeat(starts, repeats) + within
+    if inner:
+        return left_rows, order[positions]
+    right_rows = np.full(len(left_rows), -1)
+    matched = np.repeat(matches > 0, repeats)
+    right_rows[matched] = order[positions[matched]]
+    return left_rows, right_rows
+
+
+def _take_missing(values, rows):
+    """
+    Gathers rows of a column where the position -1 gives a missing
+    value. int and bool columns become float when values are missing.
+    """
+    missing = rows < 0
+    if not missing.any():
+        return values[rows]
+    if len(values) == 0:
+        values = np.asarray(values)
+        fill = None if values.dtype.kind == 'O' else np.nan
+        return np.full(len(rows), fill, dtype='O' if fill is None else 'float')
+    if isinstance(values, Categorical):
+        codes = values.codes[rows]
+        codes[missing] = -1
+        return Categorical(codes, values.categories)
+    if isinstance(values, StringArray):
+        result = values[rows]
+        valid = np.packbits(result._mask() & ~missing, bitorder='little')
+        return StringArray(result.offsets, result.data, valid)
+    result = values[rows]
+    if result.dtype.kind in 'bi':
+        result = result.astype('float')
+    result[missing] = None if result.dtype.kind == 'O' else np.nan
+    return result
+
+
+def concat(frames):
+    """
+    Stacks the rows of several DataFrames with the same columns. Every
+    output column is allocated once at its final length and each input
+    column is copied into it exactly once.
+
+    Column types are promoted the same way for every column:
+    bool, int and float combine to the widest of them, Categorical
+    columns combine the union of their categories, StringArray columns
+    stay StringArray, and any other mix that contains strings or None
+    becomes an object column. Empty DataFrames do not change the
+    column types.
+
+    Parameters
+    ----------
+    frames: list of DataFrames with the same column names in the same order
+
+    Returns
+    -------
+    A DataFrame
+    """
+    if not isinstance(frames, (list, tuple)) or not frames:
+        raise TypeError('`frames` must be a non-empty list of DataFrames')
+    for frame in frames:
+        if not isinstance(frame, DataFrame):
+            raise TypeError('`frames` must be a non-empty list of DataFrames')
+    columns = frames[0].columns
+    for frame in frames[1:]:
+        if frame.columns != columns:
+            raise ValueError('All DataFrames must have the same columns in the same order')
+
+    def join(col):
+        return _concat_columns([frame._data[col] for frame in frames])
+
+    new_data = dict(zip(columns, _map_columns(join, columns)))
+    return DataFrame._from_trusted(new_data, owned=new_data)
+
+
+def _concat_columns(parts):
+    """
+    Joins pieces of one column into a single new column, following the
+    type promotion rules of `concat`
+    """
+    n = sum(len(part) for part in parts)
+    filled = [part for part in parts if len(part)] or parts
+    if all(isinstance(part, Categorical) for part in filled):
+        return _concat_categoricals(parts, n)
+    if all(isinstance(part, StringArray) for part in filled):
+        return _concat_string_arrays(parts, n)
+    if any(isinstance(part, (Categorical, StringArray)) or part.dtype.kind == 'O'
+           for part in filled):
+        dtype = np.dtype('O')
+        parts = [np.asarray(part) if len(part) else part for part in parts]
+    else:
+        dtype = np.result_type(*filled)
+
+    values = np.empty(n, dtype=dtype)
+    start = 0
+    for part in parts:
+        if len(part):
+            values[start:start + len(part)] = part
+            start += len(part)
+    return values
+
+
+def _concat_categoricals(parts, n):
+    # the codes of every part are mapped into the sorted union of the categories
+    parts = [part for part in parts if isinstance(part, Categorical)]
+    categories = np.unique(np.concatenate([part.categories for part in parts]))
+    dtype = _code_dtype(len(categories))
+    codes = np.empty(n, dtype=dtype)
+    start = 0
+    for part in parts:
+        mapping = np.append(np.searchsorted(categories, part.categories), -1).astype(dtype)
+        # code -1 selects the -1 appended to the mapping
+        np.take(mapping, part.codes, out=codes[start:start + len(part)])
+        start += len(part)
+    return Categorical(codes, categories.astype('O'))
+
+
+def _concat_string_arrays(parts, n):
+    # the offsets of every part are moved past the bytes of the parts before it
+    buffers = [part._buffers() for part in parts if len(part)]
+    offsets = np.zeros(n + 1, dtype='int64')
+    data = np.empty(sum(len(buffer['data']) for buffer in buffers), dtype=np.uint8)
+    valid = np.empty(n, dtype='bool')
+    start = n_bytes = 0
+    for part, buffer in zip([part for part in parts if len(part)], buffers):
+        stop = start + len(part)
+        offsets[start + 1:stop + 1] = buffer['offsets'][1:] + n_bytes
+        data[n_bytes:n_bytes + len(buffer['data'])] = buffer['data']
+        valid[start:stop] = part._mask()
+        start, n_bytes = stop, n_bytes + len(buffer['data'])
+    return StringArray(offsets, data, np.packbits(valid, bitorder='little'))
+
+
+def read_csv(fn, chunksize=None, usecols=None, where=None, dtype=None,
+             infer_rows=None, workers=None, string_array=False):
+    """
+    Read in a comma-separated value file as a DataFrame
+
+    The file is read in large byte blocks and each block is tokenized
+    with NumPy by locating every comma and newline at once. Each column
+    is then converted to int, float or string with a single inference
+    pass over its raw bytes.
+
+    Parameters
+    ----------
+    fn: string of file location
+    chunksize: int
+        If given, return a generator of DataFrames with at most this
+        many rows each instead of reading the whole file at once
+    usecols: list of column names
+        Only these columns are extracted and converted
+    where: tuple or list of tuples
+        Row filters of the form (column name, operator, value) where the
+        operator is one of '>', '<', '>=', '<=', '==' or '!='. Only rows
+        that pass every filter are kept. The filters are applied while
+        parsing, so the other columns of rejected rows are never
+        extracted or converted.
+    dtype: dict
+        Maps column names to one of 'int', 'float', 'bool' or 'str'.
+        These columns are converted directly to that type without any
+        inference.
+    infer_rows: int
+        Infer the type of the remaining columns from only their first
+        `infer_rows` values and convert each column once with that
+        type. A column falls back to full inference if the rest of its
+        values do not fit.
+    workers: int
+        Split the file into this many byte ranges at line boundaries and
+        parse them in separate processes. The result is identical to
+        reading the file in a single process.
+    string_array: bool
+        If True, string columns are stored as a StringArray of UTF-8
+        bytes instead of Python strings
+
+    Returns
+    -------
+    A DataFrame or a generator of DataFrames
+    """
+    if chunksize is not None:
+        if not isinstance(chunksize, int) or chunksize < 1:
+            raise ValueError('`chunksize` must be a positive integer')
+        if workers is not None:
+            raise ValueError('`chunksize` cannot be combined with `workers`')
+        return _read_csv_chunks(fn, chunksize, usecols, where, dtype, infer_rows, string_array)
+
+    if workers is not None:
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError('`workers` must be a positive integer')
+        if workers > 1:
+            df = _read_csv_parallel(fn, workers, usecols, where, dtype, infer_rows)
+            if string_array:
+                df = DataFrame(_as_string_arrays(df._data))
+            return df
+
+    with open(fn, 'rb') as f:
+        column_names = _read_csv_header(f)
+        start = f.tell()
+    names, col_idx, predicates = _csv_selection(column_names, usecols, where, dtype)
+    kinds = _csv_kinds(names, dtype)
+    arrays = _parse_csv_range(fn, start, None, len(column_names), col_idx,
+                              predicates, kinds, infer_rows)
+    new_data = dict(zip(names, arrays))
+    if string_array:
+        new_data = _as_string_arrays(new_data)
+    return DataFrame(new_data)
+
+
+def _as_string_arrays(data):
+    # stores every string column of a dictionary of columns as a StringArray
+    return {col: StringArray.from_array(values) if values.dtype.kind == 'O' else values
+            for col, values in data.items()}
+
+
+def _parse_csv_range(fn, start, stop, n_cols, col_idx, predicates, kinds, infer_rows):
+    """
+    Parses and converts the selected columns of the lines between two
+    byte offsets of a file. `stop` is None to read to the end.
+
+    Returns
+    -------
+    A list with one array per selected column
+    """
+    with open(fn, 'rb') as f:
+        f.seek(start)
+        nbytes = None if stop is None else stop - start
+        blocks = [_parse_csv_block(block, n_cols, col_idx, predicates)
+                  for block in _iter_csv_blocks(f, nbytes=nbytes)]
+
+    arrays = []
+    for i, kind in enumerate(kinds):
+        if blocks:
+            fields = _concat_csv_fields([block[i] for block in blocks])
+        else:
+            fields = np.array([], dtype='S1')
+        arrays.append(_convert_csv_column(fields, kind, infer_rows))
+    return arrays
+
+
+def _read_csv_parallel(fn, workers, usecols, where, dtype, infer_rows):
+    """
+    Parses byte ranges of the file in a process pool and joins the
+    columns. Where ranges disagree on the type of a column it is resolved
+    as if the whole column had been inferred at once: ints and floats
+    become floats, and any strings turn the whole column into strings.
+    """
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+
+    with open(fn, 'rb') as f:
+        column_names = _read_csv_header(f)
+        offsets = [f.tell()]
+        size = os.path.getsize(fn)
+        for i in range(1, workers):
+            f.seek(max(offsets[0] + (size - offsets[0]) * i // workers, offsets[-1]))
+            f.readline()
+            offsets.append(min(f.tell(), size))
+        offsets.append(size)
+    offsets = sorted(set(offsets))
+
+    names, col_idx, predicates = _csv_selection(column_names, usecols, where, dtype)
+    kinds = _csv_kinds(names, dtype)
+    n_cols = len(column_names)
+    ranges = list(zip(offsets[:-1], offsets[1:]))
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(_parse_csv_range, fn, start, stop, n_cols, col_idx,
+                                   predicates, kinds, infer_rows)
+                   for start, stop in ranges]
+        results = [future.result() for future in futures]
+
+    new_data = {}
+    for i, col in enumerate(names):
+        parts = [arrays[i] for arrays in results]
+        found = {part.dtype.kind for part in parts if len(part)}
+        if 'O' in found:
+            # numeric ranges must be re-read as text to keep their exact strings
+            for j, (start, stop) in enumerate(ranges):
+                if len(parts[j]) and parts[j].dtype.kind != 'O':
+                    parts[j] = _parse_csv_range(fn, start, stop, n_cols, [col_idx[i]],
+                                                predicates, ['O'], None)[0]
+            new_data[col] = _concat_strings(parts)
+            continue
+        if found == {'i', 'f'}:
+            parts = [part.astype('float') for part in parts]
+        new_data[col] = np.concatenate(parts)
+    return DataFrame(new_data)
+
+
+def _read_csv_chunks(fn, chunksize, usecols=None, where=None, dtype=None, infer_rows=None,
+                     string_array=False):
+    """
+    Yields DataFrames of `chunksize` rows. Only one block of the file
+    and one chunk of fields are held in memory at a time. The data types
+    of the first chunk are used for every following chunk, including
+    whether each string column is a Categorical.
+    """
+    with open(fn, 'rb') as f:
+        column_names = _read_csv_header(f)
+        names, col_idx, predicates = _csv_selection(column_names, usecols, where, dtype)
+        kinds = _csv_kinds(names, dtype)
+        pending = [[] for _ in names]
+        n_pending = 0
+        first_chunk = True
+        categorical = [None] * len(names)
+
+        def make_chunk(fields):
+            new_data = {}
+            for i, col in enumerate(names):
+                if first_chunk:
+                    new_data[col] = _convert_csv_column(fields[i], kinds[i], infer_rows)
+                    continue
+                try:
+                    new_data[col] = _convert_csv_fields(fields[i], kinds[i], categorical[i])
+                except ValueError:
+                    raise ValueError(f'Column {col!r} cannot be converted to the '
+                                     'data type found in the first chunk')
+            if string_array:
+                new_data = _as_string_arrays(new_data)
+            return DataFrame(new_data)
+
+        for block in _iter_csv_blocks(f):
+            block_fields = _parse_csv_block(block, len(column_names), col_idx, predicates)
+            for col_pending, fields in zip(pending, block_fields):
+                col_pending.append(fields)
+            n_pending += len(block_fields[0])
+            if n_pending < chunksize:
+                continue
+
+            all_fields = [_concat_csv_fields(col_pending) for col_pending in pending]
+            n_full = n_pending - n_pending % chunksize
+            for start in range(0, n_full, chunksize):
+                df = make_chunk([fields[start:start + chunksize] for fields in all_fields])
+                if first_chunk:
+                    kinds = [values.dtype.kind for values in df._data.values()]
+                    categorical = [isinstance(values, Categorical) for values in df._data.values()]
+                    first_chunk = False
+                yield df
+            pending = [[fields[n_full:]] for fields in all_fields]
+            n_pending -= n_full
+
+        if n_pending:
+            yield make_chunk([_concat_csv_fields(col_pending) for col_pending in pending])
+
+
+_CSV_KINDS = {'int': 'i', 'float': 'f', 'bool': 'b', 'str': 'O', 'string': 'O'}
+_CSV_OPERATORS = {'>': '__gt__', '<': '__lt__', '>=': '__ge__',
+                  '<=': '__le__', '==': '__eq__', '!=': '__ne__'}
+
+
+def _csv_selection(column_names, usecols, where, dtype=None):
+    """
+    Validates `usecols`, `where` and `dtype` against the header of the file
+
+    Returns
+    -------
+    A tuple of the selected column names, their positions in the file
+    and a list of (position, operator method name, value, kind) row
+    filters
+    """
+    if usecols is None:
+        names = column_names
+    elif isinstance(usecols, list):
+        names = usecols
+    else:
+        raise TypeError('`usecols` must be a list of column names')
+
+    for col in names:
+        if col not in column_names:
+            raise ValueError(f'{col!r} is not a column in the file')
+    col_idx = [column_names.index(col) for col in names]
+
+    if dtype is not None:
+        if not isinstance(dtype, dict):
+            raise TypeError('`dtype` must be a dictionary of column names to types')
+        for col, name in dtype.items():
+            if col not in column_names:
+                raise ValueError(f'{col!r} is not a column in the file')
+            if name not in _CSV_KINDS:
+                raise ValueError(f'The type of {col!r} must be one of '
+                                 "'int', 'float', 'bool' or 'str'")
+
+    if where is None:
+        where = []
+    elif isinstance(where, tuple):
+        where = [where]
+    elif not isinstance(where, list):
+        raise TypeError('`where` must be a tuple or a list of tuples')
+
+    predicates = []
+    for condition in where:
+        if not isinstance(condition, tuple) or len(condition) != 3:
+            raise TypeError('Each filter in `where` must be a tuple of '
+                            '(column name, operator, value)')
+        col, op, value = condition
+        if col not in column_names:
+            raise ValueError(f'{col!r} is not a column in the file')
+        if op not in _CSV_OPERATORS:
+            raise ValueError(f'Operator must be one of {list(_CSV_OPERATORS)}')
+        if dtype and col in dtype:
+            kind = _CSV_KINDS[dtype[col]]
+        elif isinstance(value, str):
+            kind = 'O'
+        else:
+            kind = None
+        predicates.append((column_names.index(col), _CSV_OPERATORS[op], value, kind))
+    return names, col_idx, predicates
+
+
+def _csv_kinds(names, dtype):
+    """
+    Translates the `dtype` parameter of read_csv into a list of array
+    kinds for the selected columns. None means the kind is inferred.
+    """
+    if dtype is None:
+        return [None] * len(names)
+    return [_CSV_KINDS[dtype[col]] if col in dtype else None for col in names]
+
+
+def _parse_csv_block(block, n_cols, col_idx, predicates):
+    """
+    Extracts the fields of the selected columns from a block of lines,
+    keeping only the rows that pass every predicate
+
+    Returns
+    -------
+    A list with one fixed-width bytes array of fields per selected column
+    """
+    buf, starts, ends = _tokenize_csv_block(block, n_cols)
+    if predicates:
+        keep = np.ones(len(starts), dtype='bool')
+        for i, op, value, kind in predicates:
+            fields = _gather_csv_fields(buf, starts[:, i], ends[:, i])
+            values = _convert_csv_fields(fields, kind)
+            keep &= getattr(values, op)(value)
+        starts = starts[keep]
+        ends = ends[keep]
+    return [_gather_csv_fields(buf, starts[:, i], ends[:, i]) for i in col_idx]
+
+
+_CSV_BLOCKSIZE = 2 ** 22
+_CSV_COMMA = ord(',')
+_CSV_NEWLINE = ord('\n')
+
+# Each byte is mapped to the set of column types it can appear in. A
+# column can only be an int (or float) if every byte in it has that bit.
+_CSV_INT = 1
+_CSV_FLOAT = 2
+_CSV_CHAR_CLASS = np.zeros(256, dtype=np.uint8)
+for _char in b'0123456789+- \x00':
+    _CSV_CHAR_CLASS[_char] = _CSV_INT | _CSV_FLOAT
+for _char in b'.eEnNaAiIfFtTyY':
+    _CSV_CHAR_CLASS[_char] = _CSV_FLOAT
+
+_CSV_TRUE = [b'True', b'true', b'TRUE', b'1']
+_CSV_FALSE = [b'False', b'false', b'FALSE', b'0']
+
+
+def _format_csv_fields(values):
+    """
+    Formats an array as CSV fields without padding them to a common width
+
+    Returns
+    -------
+    A tuple of a uint8 buffer of bytes and the start and length of each
+    field in it
+    """
+    if isinstance(values, Categorical):
+        # format each category once, with code -1 selecting the empty field
+        buf, starts, lengths = _format_csv_fields(np.append(values.categories, ''))
+        return buf, starts[values.codes], lengths[values.codes]
+    if isinstance(values, StringArray):
+        # the bytes are already encoded, None becomes an empty field
+        starts = values.offsets[:-1]
+        lengths = np.where(values._mask(), np.diff(values.offsets), 0)
+        return values.data, starts, lengths
+    if values.dtype.kind == 'O':
+        buffers = _encode_strings(values)
+        return buffers['data'], buffers['offsets'][:-1], np.diff(buffers['offsets'])
+
+    # numbers are short, so the fixed-width formatting is only compacted
+    fields = values.astype('S')
+    lengths = np.char.str_len(fields)
+    starts = np.arange(len(fields)) * fields.itemsize
+    return fields.view(np.uint8), starts, lengths
+
+
+def _segment_positions(starts, lengths):
+    """
+    Returns the position of every byte of the segments beginning at
+    `starts` with the given `lengths`, one segment after the other
+    """
+    lengths = np.asarray(lengths, dtype='int64')
+    offsets = np.cumsum(lengths) - lengths
+    return np.arange(int(lengths.sum())) + np.repeat(starts - offsets, lengths)
+
+
+def _read_csv_header(f):
+    header = f.readline().decode('utf-8')
+    return header.rstrip('\r\n').split(',')
+
+
+def _iter_csv_blocks(f, blocksize=_CSV_BLOCKSIZE, nbytes=None):
+    """
+    Yields large chunks of bytes from an open binary file. Every chunk
+    ends with a newline so that no line is split between two chunks.
+    At most `nbytes` bytes are read when it is given.
+    """
+    remainder = b''
+    while True:
+        if nbytes is not None:
+            blocksize = min(blocksize, nbytes)
+            nbytes -= blocksize
+        block = f.read(blocksize)
+        if not block:
+            break
+        block = remainder + block
+        end = block.rfind(b'\n') + 1
+        remainder = block[end:]
+        if end:
+            yield block[:end]
+    if remainder.strip():
+        yield remainder + b'\n'
+
+
+def _tokenize_csv_block(block, n_cols):
+    """
+    Finds the boundaries of every field in a block of complete lines
+
+    Returns
+    -------
+    A tuple of the block as a padded uint8 array and two arrays of shape
+    (rows, columns) holding the start and end position of each field
+    """
+    if b'\r' in block:
+        block = block.replace(b'\r\n', b'\n')
+    buf = np.frombuffer(block, dtype=np.uint8)
+    ends = np.flatnonzero((buf == _CSV_COMMA) | (buf == _CSV_NEWLINE))
+
+    is_newline = buf[ends] == _CSV_NEWLINE
+    expected = np.arange(len(ends)) % n_cols == n_cols - 1
+    if not np.array_equal(is_newline, expected):
+        raise ValueError(f'Each line must have {n_cols} comma-separated values')
+
+    starts = np.empty_like(ends)
+    starts[:1] = 0
+    starts[1:] = ends[:-1] + 1
+
+    # pad the buffer so that a full-width window fits after every field
+    max_width = _round_width(int((ends - starts).max(initial=0)))
+    buf = np.concatenate([buf, np.zeros(max_width, dtype=np.uint8)])
+    return buf, starts.reshape(-1, n_cols), ends.reshape(-1, n_cols)
+
+
+def _fits_fixed_width(lengths, width):
+    # padding every field to `width` bytes at most quadruples their size
+    return len(lengths) * width <= 4 * (int(lengths.sum()) + 8 * len(lengths))
+
+
+def _concat_csv_fields(parts):
+    """
+    Concatenates the fields of several blocks. Blocks of short fields
+    are not padded to the width of a block of long ones; the fields
+    become an object array of bytes instead.
+    """
+    fixed = [part for part in parts if part.dtype.kind == 'S']
+    n = sum(len(part) for part in fixed)
+    width = max((part.itemsize for part in fixed), default=0)
+    nbytes = sum(len(part) * part.itemsize for part in fixed)
+    if n * width <= 4 * (nbytes + 8 * n):
+        return np.concatenate(parts)
+    return np.concatenate([part.astype('O') for part in parts])
+
+
+def _round_width(width):
+    # fields are padded to a multiple of 8 bytes so they can be hashed as words
+    return max(-(-width // 8) * 8, 8)
+
+
+def _gather_csv_fields(buf, starts, ends):
+    """
+    Copies every field into a fixed-width bytes array padded with nulls.
+    When a few long fields would pad the others to more than four times
+    their size, the fields are returned as an object array of bytes
+    instead, so memory stays proportional to the bytes of the fields.
+    """
+    lengths = ends - starts
+    width = _round_width(int(lengths.max(initial=0)))
+    if not _fits_fixed_width(lengths, width):
+        data = buf.tobytes()
+        fields = np.empty(len(lengths), dtype='O')
+        fields[:] = list(map(data.__getitem__, map(slice, starts.tolist(), ends.tolist())))
+        return fields
+    windows = np.lib.stride_tricks.sliding_window_view(buf, width)
+    fields = windows[starts]
+    fields *= np.arange(width) < lengths[:, None]
+    return fields.view(f'S{width}').ravel()
+
+
+def _convert_csv_fields(fields, kind=None, categorical=None):
+    """
+    Converts a fixed-width bytes array of fields to an int, float or
+    object array. The byte classes of the whole column are checked once
+    so that at most one numeric conversion is normally attempted.
+
+    Parameters
+    ----------
+    fields: fixed-width bytes array or object array of bytes
+    kind: 'i', 'f', 'b', 'O' or None
+        Convert directly to this kind of array instead of inferring it.
+        A ValueError is raised if the fields cannot be converted.
+    categorical: bool or None
+        Whether strings are returned as a Categorical. None decides by
+        the number of distinct values.
+    """
+    if kind == 'i':
+        return fields.astype('int')
+    if kind == 'f':
+        return fields.astype('float')
+    if kind == 'b':
+        is_true = np.isin(fields, _CSV_TRUE)
+        if not (is_true | np.isin(fields, _CSV_FALSE)).all():
+            raise ValueError('Boolean columns may only contain True/False or 1/0')
+        return is_true
+    if kind == 'O':
+        return _decode_csv_fields(fields, categorical)
+
+    if len(fields):
+        if fields.dtype.kind == 'O':
+            raw = np.frombuffer(b''.join(fields.tolist()), dtype=np.uint8)
+        else:
+            raw = fields.view(np.uint8)
+        possible = np.bitwise_and.reduce(_CSV_CHAR_CLASS[raw])
+    else:
+        possible = _CSV_INT | _CSV_FLOAT
+
+    if possible & _CSV_INT:
+        try:
+            return fields.astype('int')
+        except ValueError:
+            pass
+    if possible & _CSV_FLOAT:
+        try:
+            return fields.astype('float')
+        except ValueError:
+            pass
+    return _decode_csv_fields(fields, categorical)
+
+
+def _convert_csv_column(fields, kind=None, infer_rows=None):
+    """
+    Converts a whole column of fields. When the kind is not given but
+    `infer_rows` is, the kind is inferred from only the first
+    `infer_rows` fields and the column is converted once with it.
+    """
+    if kind is None and infer_rows is not None and len(fields) > infer_rows:
+        kind = _convert_csv_fields(fields[:infer_rows]).dtype.kind
+        try:
+            return _convert_csv_fields(fields, kind)
+        except ValueError:
+            kind = None
+    return _convert_csv_fields(fields, kind)
+
+
+def _decode_csv_fields(fields, categorical=False):
+    """
+    Decodes a fixed-width bytes array or an object array of bytes of
+    UTF-8 fields, decoding each distinct value only once. The result is
+    a Categorical if `categorical` is True, an object array if it is
+    False, and a Categorical only for few distinct values if it is None.
+    """
+    if fields.dtype.kind == 'O':
+        items = fields.tolist()
+        positions = dict(zip(dict.fromkeys(items), range(len(items))))
+        inverse = np.fromiter(map(positions.__getitem__, items), dtype='int', count=len(items))
+        strings = np.empty(len(positions), dtype='O')
+        strings[:] = [item.decode('utf-8') for item in positions]
+    else:
+        uniques, inverse = _factorize_bytes(fields)
+        strings = np.char.decode(uniques, 'utf-8').astype('O')
+    if categorical is None:
+        categorical = _is_low_cardinality(len(strings), len(fields))
+    if categorical:
+        order = np.argsort(strings)
+        ranks = np.empty(len(order), dtype=_code_dtype(len(order)))
+        ranks[order] = np.arange(len(order))
+        return Categorical(ranks[inverse], strings[order])
+    return strings[inverse]
+
+
+def _factorize_bytes(fields):
+    """
+    Finds the distinct values of a fixed-width bytes array by hashing
+    each value 8 bytes at a time. Falls back to sorting the values
+    themselves if two different values share a hash.
+
+    Returns
+    -------
+    A tuple of the unique values and the position of each value in them
+    """
+    width = fields.dtype.itemsize
+    if width % 8 or not fields.flags.c_contiguous:
+        return np.unique(fields, return_inverse=True)
+
+    words = fields.view(np.uint64).reshape(len(fields), width // 8)
+    hashes = words[:, 0].copy()
+    for i in range(1, words.shape[1]):
+        hashes *= np.uint64(0x100000001B3)
+        hashes ^= words[:, i]
+
+    _, first, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+    uniques = fields[first]
+    if not np.array_equal(uniques[inverse], fields):
+        return np.unique(fields, return_inverse=True)
+    return uniques, inverse
+
+
+_BINARY_MAGIC = b'PDCUB001'
+_BINARY_ALIGNMENT = 64
+
+
+def read_binary(path, mmap=True, string_array=False):
+    """
+    Read in a file written by `DataFrame.to_binary`
+
+    Parameters
+    ----------
+    path: string of file location
+    mmap: bool
+        If True, numeric columns are read-only views of the memory-mapped
+        file, so no data is read until it is used. If False, every column
+        is read into memory.
+    string_array: bool
+        If True, string columns are returned as a StringArray of the
+        stored buffers without decoding them. With `mmap`, they are
+        views of the file as well.
+
+    Returns
+    -------
+    A DataFrame
+    """
+    import json
+
+    with open(path, 'rb') as f:
+        if f.read(len(_BINARY_MAGIC)) != _BINARY_MAGIC:
+            raise ValueError(f'{path} is not a pandas_cub binary file')
+        header_length = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        header = json.loads(f.read(header_length).decode('utf-8'))
+        start = len(_BINARY_MAGIC) + 8 + header_length
+        start += -start % _BINARY_ALIGNMENT
+
+        def load(location, dtype):
+            offset, nbytes = location
+            count = nbytes // np.dtype(dtype).itemsize
+            if count == 0:
+                return np.empty(0, dtype=dtype)
+            if mmap:
+                return np.asarray(np.memmap(path, dtype=dtype, mode='r',
+                                            offset=start + offset, shape=(count,)))
+            f.seek(start + offset)
+            return np.fromfile(f, dtype=dtype, count=count)
+
+        def load_strings(locations, n):
+            return _decode_strings(
+                load(locations['offsets'], 'int64'),
+                load(locations['data'], 'uint8'),
+                np.unpackbits(load(locations['valid'], 'uint8'),
+                              count=n, bitorder='little').view('bool'))
+
+        new_data = {}
+        for column in header['columns']:
+            locations = column['buffers']
+            if column['dtype'] == 'string' and string_array:
+                new_data[column['name']] = StringArray(load(locations['offsets'], 'int64'),
+                                                       load(locations['data'], 'uint8'),
+                                                       load(locations['valid'], 'uint8'))
+            elif column['dtype'] == 'string':
+                new_data[column['name']] = load_strings(locations, header['nrows'])
+            elif column['dtype'] == 'category':
+                new_data[column['name']] = Categorical(
+                    load(locations['codes'], column['codes_dtype']),
+                    load_strings(locations, column['ncategories']))
+            else:
+                new_data[column['name']] = load(locations['values'], column['dtype'])
+    return DataFrame(new_data)
+
+
+def _encode_strings(values):
+    """
+    Encodes an object array of strings and None as an offsets+bytes pair
+    of buffers along with a validity bitmap
+    """
+    valid = values != None
+    strings = values[valid].tolist()
+    if not set(map(type, strings)) <= {str}:
+        raise TypeError('String columns may only contain strings and None')
+    encoded = list(map(str.encode, strings))
+    lengths = np.zeros(len(values), dtype='int64')
+    lengths[valid] = np.fromiter(map(len, encoded), dtype='int64', count=len(encoded))
+    offsets = np.zeros(len(values) + 1, dtype='int64')
+    np.cumsum(lengths, out=offsets[1:])
+    return {'offsets': offsets,
+            'data': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+            'valid': np.packbits(valid, bitorder='little')}
+
+
+def _decode_strings(offsets, data, valid):
+    # reuses the field extraction of read_csv, which slices the values out
+    # of the buffer one by one rather than padding them all to a long one
+    starts = offsets[:-1]
+    ends = offsets[1:]
+    width = _round_width(int((ends - starts).max(initial=0)))
+    if _fits_fixed_width(ends - starts, width):
+        data = np.concatenate([data, np.zeros(width, dtype=np.uint8)])
+    values = _decode_csv_fields(_gather_csv_fields(data, starts, ends))
+    values[~valid] = None
+    return values
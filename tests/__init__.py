@@ -8,4 +8,17 @@ def assert_df_equals(df1, df2):
         if kind == 'f':
             assert_allclose(values1, values2)
         else:
-            assert_array_equal(values1, values2)
\ No newline at end of file
+            assert_array_equal(values1, values2)
+
+def assert_peak_memory(func, *args, limit=50 * 2 ** 20):
+    # calls func(*args) and checks the most memory it held at once, in bytes
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < limit
+    return result
@@ -3,7 +3,7 @@ from numpy.testing import assert_array_equal
 import pytest
 
 import pandas_cub as pdc
-from tests import assert_df_equals
+from tests import assert_df_equals, assert_peak_memory
 
 pytestmark = pytest.mark.filterwarnings("ignore")
 
@@ -15,6 +15,13 @@ e = np.array([1, 2, 3])
 df = pdc.DataFrame({'a': a, 'b': b, 'c': c, 'd': d, 'e': e})
 
 
+def long_strings(short):
+    # 20,000 copies of the short strings with one 10,000 character string among them
+    values = np.array(short * (20000 // len(short)), dtype='O')
+    values[5000] = 'w' * 10000
+    return values
+
+
 class TestDataFrameCreation:
 
     def test_input_types(self):
@@ -166,6 +173,54 @@ class TestSelection:
         df_result = df[1:, 0]
         assert_df_equals(df_result, df_answer)
 
+    def test_array_row_selections(self):
+        df_result = df[np.array([2, 0]), ['a', 'e']]
+        df_answer = pdc.DataFrame({'a': a[[2, 0]], 'e': e[[2, 0]]})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df[np.array([True, False, True])]
+        df_answer = pdc.DataFrame({'a': a[[0, 2]], 'b': b[[0, 2]], 'c': c[[0, 2]],
+                                   'd': d[[0, 2]], 'e': e[[0, 2]]})
+        assert_df_equals(df_result, df_answer)
+
+        with pytest.raises(TypeError):
+            df[np.array([1.5]), 'a']
+
+    def test_logical_operators(self):
+        df_result = df[(df['e'] > 1) & (df['a'] != 'c')]
+        assert_df_equals(df_result, df[np.array([1])])
+
+        df_result = df[(df['e'] > 2) | ~df['d']]
+        assert_df_equals(df_result, df[np.array([1, 2])])
+
+        df_result = df[['d']] ^ True
+        assert_df_equals(df_result, pdc.DataFrame({'d': ~d}))
+
+        with pytest.raises(TypeError):
+            ~df[['c']]
+
+    def test_query(self):
+        df_result = df.query("e > 1 and a != 'c'")
+        assert_df_equals(df_result, df[np.array([1])])
+
+        df_result = df.query("not d or b == None")
+        assert_df_equals(df_result, df[np.array([1, 2])])
+
+        df_result = df.query("1 < e * 2 <= 4 and a in ['a', 'b', 'z']")
+        assert_df_equals(df_result, df[np.array([0, 1])])
+
+        df_result = df.query("(e % 2 == 1) & d")
+        assert_df_equals(df_result, df[np.array([0, 2])])
+
+        with pytest.raises(KeyError):
+            df.query('z > 1')
+        with pytest.raises(TypeError):
+            df.query('e + 1')
+        with pytest.raises(ValueError):
+            df.query('e.sum() > 1')
+        with pytest.raises(ValueError):
+            df.query('e >')
+
     def test_list_columns(self):
         df_answer = pdc.DataFrame({'c': c, 'e': e})
         assert_df_equals(df[:, [2, 4]], df_answer)
@@ -337,6 +392,26 @@ class TestAggregation:
                                    'c': np.array([1])})
         assert_df_equals(df_result, df_answer)
 
+    def test_skipna(self):
+        df_temp = pdc.DataFrame({'a': np.array(['b', None, 'a'], dtype='O'),
+                                 'c': np.array([3.4, np.nan, 5.1])})
+        df_result = df_temp.min(skipna=True)
+        df_answer = pdc.DataFrame({'a': np.array(['a'], dtype='O'),
+                                   'c': np.array([3.4])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp.argmax(skipna=True)
+        df_answer = pdc.DataFrame({'a': np.array([0]), 'c': np.array([2])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp.mean(skipna=True)
+        df_answer = pdc.DataFrame({'c': np.array([4.25])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp.std(skipna=True)
+        df_answer = pdc.DataFrame({'c': np.array([np.std([3.4, 5.1])])})
+        assert_df_equals(df_result, df_answer)
+
 
 a3 = np.array(['a', None, 'c'])
 b3 = np.array([11, 5, 8])
@@ -365,6 +440,43 @@ class TestOtherMethods:
                                    'c': np.array([2])})
         assert_df_equals(df_result, df_answer)
 
+    def test_agg(self):
+        # missing values are skipped
+        df_result = df3.agg(['count', 'min', 'max', 'argmin'])
+        df_answer = pdc.DataFrame({'statistic': np.array(['count', 'min', 'max', 'argmin'],
+                                                         dtype='O'),
+                                   'a': np.array([2, 'a', 'c', 0], dtype='O'),
+                                   'b': np.array([3, 5, 11, 1]),
+                                   'c': np.array([2, 3.4, 5.1, 0])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df3[['c']].agg(['mean', 'std', '50%', 'max'])
+        assert_array_equal(np.round(df_result._data['c'], 10), [4.25, .85, 4.25, 5.1])
+
+        df_result = df42.agg(['sum', 'mean', 'var', 'std', 'median', '50%'])
+        for col, values in df42._data.items():
+            answer = [values.sum(), values.mean(), values.var(), values.std(),
+                      np.median(values), np.median(values)]
+            assert_array_equal(np.round(df_result._data[col], 10), np.round(answer, 10))
+
+        with pytest.raises(ValueError):
+            df42.agg(['not_a_stat'])
+        for name in ['cumsum', 'sort']:
+            with pytest.raises(ValueError, match=name):
+                df42.agg(['mean', name])
+        with pytest.raises(ValueError, match='statistic'):
+            pdc.DataFrame({'statistic': np.array([1, 2, 3])}).agg(['sum'])
+
+    def test_describe(self):
+        df_result = df42.describe()
+        assert df_result.columns == ['statistic', 'a', 'b']
+        assert df_result._data['statistic'].tolist() == ['count', 'mean', 'std', 'min',
+                                                         '25%', '50%', '75%', 'max']
+        assert_array_equal(df_result._data['a'][[0, 3, 5, 7]], [3, -11, 3, 5])
+
+        df_result = df42[:0, :].describe()
+        assert_array_equal(df_result._data['a'], [0] + [np.nan] * 7)
+
     def test_unique(self):
         df_result = df4.unique()
         assert_array_equal(df_result[0].values[:, 0], np.unique(a4))
@@ -383,6 +495,21 @@ class TestOtherMethods:
         df_answer = pdc.DataFrame({'A': a4, 'b': b4, 'C': c4})
         assert_df_equals(df_result, df_answer)
 
+        with pytest.raises(TypeError):
+            df4.rename({'a': 1})
+
+    def test_derived_frames(self):
+        # results are built without re-validation but match the constructor
+        df_result = df4.min()
+        df_answer = pdc.DataFrame({'a': np.array(['a']), 'b': np.array([5]),
+                                   'c': np.array([np.nan])})
+        assert_df_equals(df_result, df_answer)
+        assert df_result['a'].str.upper('a')._data['a'].dtype == 'O'
+        assert 'skipna' in pdc.DataFrame.max.__doc__
+
+        with pytest.raises(ValueError):
+            df4[['b']] + np.ones((3, 3))
+
     def test_drop(self):
         df_result = df4.drop(['a', 'b'])
         df_answer = pdc.DataFrame({'c': c4})
@@ -440,12 +567,81 @@ class TestNonAgg:
                                    'b': np.array([np.nan, 1.7, -11.1])})
         assert_df_equals(df_result, df_answer)
 
+        df_result = df42.diff(-2)
+        df_answer = pdc.DataFrame({'a': np.array([-14, np.nan, np.nan]),
+                                   'b': np.array([9.4, np.nan, np.nan])})
+        assert_df_equals(df_result, df_answer)
+
+    def test_shift(self):
+        df_result = df42.shift(1)
+        df_answer = pdc.DataFrame({'a': np.array([np.nan, -11, 5]),
+                                   'b': np.array([np.nan, 3.4, 5.1])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df42.shift(-5)
+        df_answer = pdc.DataFrame({'a': np.full(3, np.nan), 'b': np.full(3, np.nan)})
+        assert_df_equals(df_result, df_answer)
+
+        values = np.array(['x', None, 'y'], dtype='O')
+        df = pdc.DataFrame({'a': np.array([1, 2, 3]), 'b': values,
+                            'c': pdc.Categorical.from_array(values),
+                            'd': pdc.StringArray.from_array(values)})
+        df_result = df.shift(-1)
+        shifted = np.array([None, 'y', None], dtype='O')
+        assert isinstance(df_result._data['c'], pdc.Categorical)
+        assert isinstance(df_result._data['d'], pdc.StringArray)
+        df_answer = pdc.DataFrame({'a': np.array([2, 3, np.nan]), 'b': shifted,
+                                   'c': shifted, 'd': shifted})
+        assert_df_equals(df_result, df_answer)
+        assert_df_equals(df.shift(1)[1:, ['b', 'c', 'd']], df[:2, ['b', 'c', 'd']])
+
     def test_pct_change(self):
         df_result = df42.pct_change(1)
         df_answer = pdc.DataFrame({'a': np.array([np.nan, 16 / -11, -2 / 5]),
                                    'b': np.array([np.nan, 1.7 / 3.4, -11.1 / 5.1])})
         assert_df_equals(df_result, df_answer)
 
+    def test_rolling(self):
+        a = np.array([3, 1, 4, 1, 5, 9])
+        c = np.array(['x', 'y', 'x', 'y', 'x', 'y'], dtype='O')
+        df = pdc.DataFrame({'a': a, 'b': np.array([1.5, np.nan, 2., 6., 3., 1.]), 'c': c})
+        df_result = df.rolling(3).sum()
+        df_answer = pdc.DataFrame({'a': np.array([np.nan, np.nan, 8, 6, 10, 15]),
+                                   'b': np.array([np.nan, np.nan, np.nan, np.nan, 11, 10]),
+                                   'c': c})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df.rolling(2).max()
+        df_answer = pdc.DataFrame({'a': np.array([np.nan, 3, 4, 4, 5, 9]),
+                                   'b': np.array([np.nan, np.nan, np.nan, 6, 6, 3]),
+                                   'c': c})
+        assert_df_equals(df_result, df_answer)
+
+        windows = np.array([a[i:i + 4] for i in range(3)])
+        np.testing.assert_allclose(df.rolling(4).mean()['a'].values[3:, 0], windows.mean(axis=1))
+        np.testing.assert_allclose(df.rolling(4).std()['a'].values[3:, 0], windows.std(axis=1))
+        np.testing.assert_allclose(df.rolling(4).min()['a'].values[3:, 0], windows.min(axis=1))
+        assert np.isnan(df.rolling(7).mean()['a'].values).all()
+
+        with pytest.raises(ValueError):
+            df.rolling(0)
+
+    def test_expanding(self):
+        df = pdc.DataFrame({'a': np.array([3, 1, 4, 1, 5]),
+                            'b': np.array([1.5, np.nan, 2., 6., 3.])})
+        df_result = df.expanding().sum()
+        df_answer = pdc.DataFrame({'a': np.array([3., 4, 8, 9, 14]),
+                                   'b': np.array([1.5, np.nan, np.nan, np.nan, np.nan])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df.expanding().min()
+        df_answer = pdc.DataFrame({'a': np.array([3., 1, 1, 1, 1]),
+                                   'b': np.array([1.5, np.nan, np.nan, np.nan, np.nan])})
+        assert_df_equals(df_result, df_answer)
+
+        np.testing.assert_allclose(df.expanding().mean()['a'].values[:, 0],
+                                   [3, 2, 8 / 3, 9 / 4, 14 / 5])
+
 
 a5 = np.array([11, 5])
 b5 = np.array([3.4, 5.1])
@@ -590,6 +786,49 @@ class TestMoreMethods:
         with pytest.raises(ValueError):
             df7.sample(frac=-2)
 
+    def test_nlargest_nsmallest(self):
+        df_result = df8.nsmallest(3, ['b', 'a'])
+        df_answer = pdc.DataFrame({'a': np.array(['a', 'a', 'a'], dtype=object),
+                                   'b': np.array(['A', 'A', 'A'], dtype=object),
+                                   'c': np.array([2, 3, 4])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df8.nlargest(2, 'b')
+        df_answer = pdc.DataFrame({'a': np.array(['a', 'a'], dtype=object),
+                                   'b': np.array(['B', 'B'], dtype=object),
+                                   'c': np.array([7, 6])})
+        assert_df_equals(df_result, df_answer)
+
+        for by in ['c', ['a', 'c'], ['b', 'a']]:
+            for n in [0, 3, 8, 10]:
+                assert_df_equals(df8.nsmallest(n, by), df8.sort_values(by).head(n))
+                assert_df_equals(df8.nlargest(n, by), df8.sort_values(by, asc=False).head(n))
+
+    def test_concat(self):
+        df_result = pdc.concat([df8[:2, :], df8[:0, :], df8[2:, :]])
+        assert_df_equals(df_result, df8)
+
+        df1 = pdc.DataFrame({'a': np.array([1, 2]), 'b': np.array(['x', 'y'], dtype=object)})
+        df2 = pdc.DataFrame({'a': np.array([.5]), 'b': np.array([None], dtype=object)})
+        df_result = pdc.concat([df1, df2])
+        df_answer = pdc.DataFrame({'a': np.array([1, 2, .5]),
+                                   'b': np.array(['x', 'y', None], dtype=object)})
+        assert_df_equals(df_result, df_answer)
+
+        b = pdc.Categorical.from_array(np.array(['y', 'x', 'y'], dtype=object))
+        df3 = pdc.DataFrame({'a': np.array([True, False, True]), 'b': b})
+        df_result = pdc.concat([df3, df1])
+        assert df_result._data['a'].dtype.kind == 'i'
+        assert df_result._data['b'].tolist() == ['y', 'x', 'y', 'x', 'y']
+        df_result = pdc.concat([df3, df3])
+        assert isinstance(df_result._data['b'], pdc.Categorical)
+        assert df_result._data['b'].tolist() == ['y', 'x', 'y'] * 2
+
+        with pytest.raises(TypeError):
+            pdc.concat(df1)
+        with pytest.raises(ValueError):
+            pdc.concat([df1, df8])
+
 
 a8 = np.array(['b', 'a', 'a', 'a', 'b', 'a', 'a', 'b'])
 b8 = np.array(['B', 'A', 'A', 'A', 'B', 'B', 'B', 'A'])
@@ -651,6 +890,109 @@ class TestGrouping:
         assert_df_equals(df_result, df_answer)
 
 
+    def test_pivot_table_aggfuncs(self):
+        df_result = df8.pivot_table(rows='a', values='c', aggfunc='std')
+        df_answer = pdc.DataFrame({'a': np.array(['a', 'b'], dtype=object),
+                                   'std': np.array([c8[a8 == 'a'].std(),
+                                                    c8[a8 == 'b'].std()])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df8[:3, :].pivot_table(rows='a', columns='b', values='c', aggfunc='max')
+        df_answer = pdc.DataFrame({'a': np.array(['a', 'b'], dtype=object),
+                                   'A': np.array([3., np.nan]),
+                                   'B': np.array([np.nan, 1.])})
+        assert_df_equals(df_result, df_answer)
+
+    def test_groupby_agg(self):
+        df_result = df8.groupby(['a', 'b']).agg({'c': ['sum', 'max'], 'a': 'size'})
+        df_answer = pdc.DataFrame({'a': np.array(['a', 'a', 'b', 'b'], dtype=object),
+                                   'b': np.array(['A', 'B', 'A', 'B'], dtype=object),
+                                   'c_sum': np.array([9, 13, 8, 6]),
+                                   'c_max': np.array([4, 7, 8, 5]),
+                                   'a_size': np.array([3, 2, 1, 2])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df8.groupby('a').agg({'c': 'mean'})
+        df_answer = df8.pivot_table(rows='a', values='c', aggfunc='mean').rename({'mean': 'c_mean'})
+        assert_df_equals(df_result, df_answer)
+
+        with pytest.raises(KeyError):
+            df8.groupby('z')
+        with pytest.raises(ValueError):
+            df8.groupby('a').agg({'c': 'not_a_func'})
+        with pytest.raises(ValueError, match='cumsum'):
+            df8.groupby('a').agg({'c': 'cumsum'})
+
+        # missing keys form one group after the others, for strings and Categoricals
+        k = np.array(['b', None, 'a', None], dtype='O')
+        v = np.array([1, 2, 3, 4])
+        df_answer = pdc.DataFrame({'k': np.array(['a', 'b', None], dtype='O'),
+                                   'v_sum': np.array([3, 1, 6])})
+        for keys in [k, pdc.Categorical.from_array(k)]:
+            df_result = pdc.DataFrame({'k': keys, 'v': v}).groupby('k').agg({'v': 'sum'})
+            assert_df_equals(df_result, df_answer)
+
+        df = pdc.DataFrame({'k': np.array([1, 1, 2]), 'v': np.array([1, 2, 3])})
+        g = df.groupby('k')
+        df += 100
+        df_answer = pdc.DataFrame({'k': np.array([1, 2]), 'size': np.array([2, 1])})
+        assert_df_equals(g.size(), df_answer)
+        df_answer = pdc.DataFrame({'k': np.array([1, 2]), 'v_sum': np.array([3, 3])})
+        assert_df_equals(g.agg({'v': 'sum'}), df_answer)
+
+    def test_merge(self):
+        left = pdc.DataFrame({'k': np.array(['a', 'b', 'c', 'b'], dtype=object),
+                              'v': np.array([1, 2, 3, 4])})
+        right = pdc.DataFrame({'k': np.array(['b', 'd', 'a', 'b'], dtype=object),
+                               'v': np.array([.5, .6, .7, .8])})
+        for algorithm in ['hash', 'sort']:
+            df_result = left.merge(right, 'k', algorithm=algorithm)
+            df_answer = pdc.DataFrame({'k': np.array(['a', 'b', 'b', 'b', 'b'], dtype=object),
+                                       'v_x': np.array([1, 2, 2, 4, 4]),
+                                       'v_y': np.array([.7, .5, .8, .5, .8])})
+            assert_df_equals(df_result, df_answer)
+
+            df_result = left.merge(right, 'k', how='left', algorithm=algorithm)
+            df_answer = pdc.DataFrame({'k': np.array(['a', 'b', 'b', 'c', 'b', 'b'], dtype=object),
+                                       'v_x': np.array([1, 2, 2, 3, 4, 4]),
+                                       'v_y': np.array([.7, .5, .8, np.nan, .5, .8])})
+            assert_df_equals(df_result, df_answer)
+
+            df_result = left.merge(right, 'k', how='outer', algorithm=algorithm)
+            k = np.array(['a', 'b', 'b', 'c', 'b', 'b', 'd'], dtype=object)
+            df_answer = pdc.DataFrame({'k': k,
+                                       'v_x': np.array([1, 2, 2, 3, 4, 4, np.nan]),
+                                       'v_y': np.array([.7, .5, .8, np.nan, .5, .8, .6])})
+            assert_df_equals(df_result, df_answer)
+
+        df_result = df8.merge(df8[:2, :], ['a', 'b'], suffixes=('', '_first'))
+        df_answer = pdc.DataFrame({'a': np.array(['b', 'a', 'a', 'a', 'b'], dtype=object),
+                                   'b': np.array(['B', 'A', 'A', 'A', 'B'], dtype=object),
+                                   'c': np.array([1, 2, 3, 4, 5]),
+                                   'c_first': np.array([1, 2, 2, 2, 1])})
+        assert_df_equals(df_result, df_answer)
+
+        with pytest.raises(KeyError):
+            left.merge(df8, 'k')
+        with pytest.raises(ValueError):
+            left.merge(right, 'k', how='cross')
+        with pytest.raises(ValueError):
+            df8.merge(df8, ['a', 'b'], algorithm='sort')
+
+        # missing keys match no row, not even another missing key
+        left_k = np.array(['a', None, 'b'], dtype='O')
+        right_k = np.array([None, 'a', 'c'], dtype='O')
+        df_answer = pdc.DataFrame({'k': np.array(['a', None, 'b', None, 'c'], dtype='O'),
+                                   'v': np.array([0, 1, 2, np.nan, np.nan]),
+                                   'w': np.array([1, np.nan, np.nan, 0, 2])})
+        for encode in [np.asarray, pdc.Categorical.from_array]:
+            left = pdc.DataFrame({'k': encode(left_k), 'v': np.arange(3)})
+            right = pdc.DataFrame({'k': encode(right_k), 'w': np.arange(3)})
+            for algorithm in ['hash', 'sort']:
+                assert_df_equals(left.merge(right, 'k', 'outer', algorithm=algorithm), df_answer)
+                assert_df_equals(left.merge(right, 'k', algorithm=algorithm), df_answer[:1, :])
+
+
 movie = np.array(['field of dreams', 'star wars'], dtype='O')
 num = np.array(['5.1', '6'], dtype='O')
 df_string = pdc.DataFrame({'movie': movie, 'num': num})
@@ -806,6 +1148,21 @@ class TestStrings:
         answer = pdc.DataFrame({'movie': movie})
         assert_df_equals(result, answer)
 
+    def test_missing(self):
+        movie = np.array(['star wars', None, 'jaws'] * 4, dtype='O')
+        df_temp = pdc.DataFrame({'movie': movie})
+        result = df_temp.str.upper('movie')
+        answer = pdc.DataFrame({'movie': np.array(['STAR WARS', None, 'JAWS'] * 4, dtype='O')})
+        assert_df_equals(result, answer)
+
+        result = df_temp.str.find('movie', 'a')
+        answer = pdc.DataFrame({'movie': np.array([2, None, 1] * 4, dtype='O')})
+        assert_df_equals(result, answer)
+
+        result = df_temp[:2, :].str.len('movie')
+        answer = pdc.DataFrame({'movie': np.array([9, None], dtype='O')})
+        assert_df_equals(result, answer)
+
 
 df_emp = pdc.read_csv('data/employee.csv')
 
@@ -820,7 +1177,7 @@ class TestReadCSV:
     def test_data_types(self):
         df_result = df_emp.dtypes
         cols = np.array(['dept', 'race', 'gender', 'salary'], dtype='O')
-        dtypes = np.array(['string', 'string', 'string', 'int'], dtype='O')
+        dtypes = np.array(['category', 'category', 'category', 'int'], dtype='O')
         df_answer = pdc.DataFrame({'Column Name': cols,
                                    'Data Type': dtypes})
         assert_df_equals(df_result, df_answer)
@@ -841,4 +1198,343 @@ class TestReadCSV:
                 'salary': np.array([45279, 63166, 66614, 71680, 42390])}
         result = df_emp.head()
         answer = pdc.DataFrame(data)
-        assert_df_equals(result, answer)
\ No newline at end of file
+        assert_df_equals(result, answer)
+
+    def test_mixed_types(self, tmp_path):
+        fn = tmp_path / 'mixed.csv'
+        fn.write_text('a,b,c,d\r\n1,2.5,x,\r\n-3,nan,y,5\r\n')
+        df_result = pdc.read_csv(fn)
+        df_answer = pdc.DataFrame({'a': np.array([1, -3]),
+                                   'b': np.array([2.5, np.nan]),
+                                   'c': np.array(['x', 'y'], dtype='O'),
+                                   'd': np.array(['', '5'], dtype='O')})
+        assert_df_equals(df_result, df_answer)
+
+    def test_chunksize(self):
+        chunks = list(pdc.read_csv('data/employee.csv', chunksize=500))
+        assert [len(chunk) for chunk in chunks] == [500, 500, 500, 35]
+        for chunk in chunks:
+            assert chunk.columns == df_emp.columns
+        assert_df_equals(chunks[1], df_emp[500:1000, :])
+
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', chunksize=0)
+
+    def test_long_field(self, tmp_path):
+        # one long field must not pad every other field to its width
+        b = long_strings(['x', 'yz'])
+        fn = tmp_path / 'long.csv'
+        fn.write_text('a,b\n' + ''.join(f'{i},{value}\n' for i, value in enumerate(b)))
+        df_result = assert_peak_memory(pdc.read_csv, fn)
+        df_answer = pdc.DataFrame({'a': np.arange(20000), 'b': b})
+        assert_df_equals(df_result, df_answer)
+
+    def test_chunksize_schema(self, tmp_path):
+        fn = tmp_path / 'schema.csv'
+        fn.write_text('a,b\n1,x\n2,y\n3.5,z\n')
+        chunks = pdc.read_csv(fn, chunksize=2)
+        assert next(chunks)._data['a'].dtype.kind == 'i'
+        with pytest.raises(ValueError):
+            next(chunks)
+
+    def test_chunksize_categorical(self, tmp_path):
+        fn = tmp_path / 'categorical.csv'
+        fn.write_text('a\n' + 'x\n' * 4 + 'a\nb\nc\nd\n' + 'y\n' * 4)
+        chunks = list(pdc.read_csv(fn, chunksize=4))
+        assert all(isinstance(chunk._data['a'], pdc.Categorical) for chunk in chunks)
+        assert chunks[1]['a'].values[:, 0].tolist() == ['a', 'b', 'c', 'd']
+
+        fn.write_text('a\n' + 'a\nb\nc\nd\n' + 'x\n' * 4)
+        chunks = list(pdc.read_csv(fn, chunksize=4))
+        assert all(chunk._data['a'].dtype.kind == 'O' for chunk in chunks)
+        assert chunks[1]['a'].values[:, 0].tolist() == ['x'] * 4
+
+    def test_usecols_where(self):
+        df_result = pdc.read_csv('data/employee.csv', usecols=['salary', 'race'],
+                                 where=[('salary', '>', 100000), ('gender', '==', 'Female')])
+        keep = (df_emp['salary'] > 100000)._data['salary'] & \
+               (df_emp['gender'] == 'Female')._data['gender']
+        df_answer = pdc.DataFrame({'salary': df_emp._data['salary'][keep],
+                                   'race': df_emp._data['race'][keep]})
+        assert_df_equals(df_result, df_answer)
+
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', usecols=['not a column'])
+
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', where=('salary', '=>', 5))
+
+    def test_dtype(self, tmp_path):
+        fn = tmp_path / 'dtype.csv'
+        fn.write_text('a,b,c\nTrue,1,5\nfalse,2,6\n1,3,x\n')
+        df_result = pdc.read_csv(fn, dtype={'a': 'bool', 'b': 'float', 'c': 'str'})
+        df_answer = pdc.DataFrame({'a': np.array([True, False, True]),
+                                   'b': np.array([1., 2., 3.]),
+                                   'c': np.array(['5', '6', 'x'], dtype='O')})
+        assert_df_equals(df_result, df_answer)
+
+        with pytest.raises(ValueError):
+            pdc.read_csv(fn, dtype={'c': 'int'})
+
+        with pytest.raises(ValueError):
+            pdc.read_csv(fn, dtype={'b': 'complex'})
+
+    def test_infer_rows(self, tmp_path):
+        fn = tmp_path / 'infer.csv'
+        fn.write_text('a,b\n1,1\n2,2\n3,x\n4.5,4\n')
+        df_result = pdc.read_csv(fn, infer_rows=2)
+        df_answer = pdc.DataFrame({'a': np.array([1, 2, 3, 4.5]),
+                                   'b': np.array(['1', '2', 'x', '4'], dtype='O')})
+        assert_df_equals(df_result, df_answer)
+
+    def test_workers(self, tmp_path):
+        df_result = pdc.read_csv('data/employee.csv', workers=3)
+        assert_df_equals(df_result, df_emp)
+
+        # one range sees only ints, another floats and strings
+        fn = tmp_path / 'workers.csv'
+        rows = [f'{i},{i}' for i in range(1000)]
+        rows[900] = '1.5,x'
+        fn.write_text('a,b\n' + '\n'.join(rows) + '\n')
+        df_single = pdc.read_csv(fn)
+        df_result = pdc.read_csv(fn, workers=4)
+        assert df_result._data['a'].dtype.kind == 'f'
+        assert df_result._data['b'].dtype.kind == 'O'
+        assert_df_equals(df_result, df_single)
+
+
+class TestCategorical:
+
+    def test_read_csv(self):
+        race = df_emp._data['race']
+        assert isinstance(race, pdc.Categorical)
+        assert race.categories.tolist() == ['Asian', 'Black', 'Hispanic',
+                                            'Native American', 'White']
+        assert race.codes.dtype == np.int8
+
+    def test_methods(self):
+        values = np.array(['b', None, 'a', 'b'], dtype='O')
+        df_cat = pdc.DataFrame({'a': pdc.Categorical.from_array(values)})
+        df_obj = pdc.DataFrame({'a': values})
+        assert_df_equals(df_cat.dtypes, pdc.DataFrame({'Column Name': np.array(['a']),
+                                                       'Data Type': np.array(['category'])}))
+        assert_df_equals(df_cat == 'b', df_obj == 'b')
+        assert_df_equals(df_cat.isna(), df_obj.isna())
+        assert_df_equals(df_cat[[0, 2], :], df_obj[[0, 2], :])
+        assert_df_equals(df_cat.str.upper('a'), df_obj.str.upper('a'))
+
+        df_result = df_cat[[0, 2, 3], :].value_counts()
+        df_answer = pdc.DataFrame({'a': np.array(['b', 'a'], dtype='O'),
+                                   'count': np.array([2, 1])})
+        assert_df_equals(df_result, df_answer)
+
+
+class TestStringArray:
+
+    def test_methods(self):
+        values = np.array(['b', None, 'héllo', '', 'b'], dtype='O')
+        df_arr = pdc.DataFrame({'a': pdc.StringArray.from_array(values)})
+        df_obj = pdc.DataFrame({'a': values})
+        assert df_arr._data['a'][2] == 'héllo'
+        assert df_arr._data['a'][1] is None
+        assert_df_equals(df_arr.dtypes, df_obj.dtypes)
+        assert_df_equals(df_arr == 'b', df_obj == 'b')
+        assert_df_equals(df_arr != '', df_obj != '')
+        assert_df_equals(df_arr.isna(), df_obj.isna())
+        assert_df_equals(df_arr[1:4, :], df_obj[1:4, :])
+        assert_df_equals(df_arr[[4, 0, 2], :], df_obj[[4, 0, 2], :])
+
+        df_result = df_arr.str.upper('a')
+        assert isinstance(df_result._data['a'], pdc.StringArray)
+        assert_df_equals(df_result, df_obj.str.upper('a'))
+        assert_df_equals(df_arr.str.len('a'), df_obj.str.len('a'))
+
+    def test_long_value(self):
+        values = long_strings(['x', None])
+        result = assert_peak_memory(np.asarray, pdc.StringArray.from_array(values))
+        assert result.tolist() == values.tolist()
+
+    def test_io(self, tmp_path):
+        df_result = pdc.read_csv('data/employee.csv', string_array=True)
+        assert isinstance(df_result._data['dept'], pdc.StringArray)
+        assert_df_equals(df_result, df_emp)
+
+        fn = tmp_path / 'employee.pdc'
+        df_result.to_binary(fn)
+        df_result = pdc.read_binary(fn, string_array=True)
+        assert isinstance(df_result._data['race'], pdc.StringArray)
+        assert not df_result._data['race'].data.flags.writeable
+        assert_df_equals(df_result, df_emp)
+
+        fn = tmp_path / 'employee.csv'
+        df_result[10:, :].to_csv(fn)
+        assert_df_equals(pdc.read_csv(fn), df_emp[10:, :])
+
+
+class TestCopyOnWrite:
+
+    def test_shared_columns(self):
+        df_copy = df.copy()
+        df_renamed = df_copy.rename({'e': 'f'}).drop('a')
+        df_head = df_copy.head(2)
+        assert df_copy._data['e'] is df._data['e']
+        assert df_renamed._data['f'] is df._data['e']
+
+        df_copy[0, 'e'] = 100
+        df_copy[np.array([1, 2]), ['a', 'b']] = 'z'
+        assert_array_equal(df_copy._data['e'], np.array([100, 2, 3]))
+        assert_array_equal(df_copy._data['a'], np.array(['a', 'z', 'z'], dtype='O'))
+        assert_df_equals(df, pdc.DataFrame({'a': a, 'b': b, 'c': c, 'd': d, 'e': e}))
+        assert_array_equal(df_renamed._data['f'], e)
+        assert_array_equal(df_head._data['e'], e[:2])
+
+    def test_inplace_operators(self):
+        df_result = df[['c', 'e']]
+        df_result += 1
+        values = df_result._data['e']
+        df_result *= 2
+        assert df_result._data['e'] is values
+        assert_df_equals(df_result, pdc.DataFrame({'c': (c + 1) * 2, 'e': (e + 1) * 2}))
+        assert_array_equal(df._data['e'], e)
+
+        df_result /= 4
+        assert_array_equal(df_result._data['e'], (e + 1) / 2)
+
+        df_result = df.copy()
+        with pytest.raises(TypeError):
+            df_result -= 1
+        assert_df_equals(df_result, df)
+
+        df_result = pdc.DataFrame({'a': np.array(['s', 't'], dtype='O'),
+                                   'b': np.array(['u', 5], dtype='O')})
+        df_copy = df_result.copy()
+        with pytest.raises(TypeError):
+            df_result += np.array(['x', 'y'], dtype='O')
+        assert_df_equals(df_result, df_copy)
+
+        # the columns of a computed DataFrame are its own and are not copied
+        df_result = df[['c', 'e']] * 2
+        values = df_result._data['e']
+        df_result += 1
+        assert df_result._data['e'] is values
+        assert_array_equal(values, e * 2 + 1)
+
+        df_result = df[[2, 0, 1], ['c', 'e']]
+        values = df_result._data['e']
+        df_result += 1
+        assert df_result._data['e'] is values
+        assert_array_equal(df._data['e'], e)
+
+
+class TestOptions:
+
+    def test_threads(self):
+        assert pdc.get_option('threads') == 1
+        with pdc.option_context('threads', 3):
+            assert pdc.get_option('threads') == 3
+            df_std = df.std()
+            df_mul = df[['c', 'e']] * 1.1
+            df_abs = df.abs()
+        assert pdc.get_option('threads') == 1
+        assert_df_equals(df_std, df.std())
+        assert_df_equals(df_mul, df[['c', 'e']] * 1.1)
+        assert_df_equals(df_abs, df.abs())
+
+        with pytest.raises(ValueError):
+            pdc.set_option('threads', 0)
+        with pytest.raises(KeyError):
+            pdc.get_option('not_an_option')
+
+
+class TestLazy:
+
+    def test_collect(self):
+        lf = df_emp.lazy()
+        lf_result = lf[lf['salary'] > 50000][['dept', 'salary']].sort_values('salary').head(10)
+        df_answer = df_emp[df_emp['salary'] > 50000][['dept', 'salary']]
+        df_answer = df_answer.sort_values('salary').head(10)
+        assert_df_equals(lf_result.collect(), df_answer)
+
+        lf_result = lf[lf['race'] == 'White'][['salary']]
+        lf_result = lf_result[lf_result['salary'] < 40000].max()
+        df_answer = df_emp[df_emp['race'] == 'White'][['salary']]
+        df_answer = df_answer[df_answer['salary'] < 40000].max()
+        assert_df_equals(lf_result.collect(), df_answer)
+
+        lf_result = lf[(lf[['salary']] * 2) > 100000].head(3)
+        df_answer = df_emp[(df_emp[['salary']] * 2) > 100000].head(3)
+        assert_df_equals(lf_result.collect(), df_answer)
+
+        with pytest.raises(KeyError):
+            lf['z']
+
+    def test_optimize(self):
+        lf = df_emp.lazy()
+        lf_result = lf[lf['salary'] > 50000][['dept', 'salary']]
+        lf_result = lf_result[lf_result['dept'] == 'Parks & Recreation']
+        lf_result = lf_result.sort_values('salary').head(10)
+        assert lf_result.explain() == (
+            "TopK by=['salary'] asc=True n=10\n"
+            "  Project columns=['dept', 'salary']\n"
+            "    Scan columns=['dept', 'salary'] "
+            "filter=salary > 50000 and dept == 'Parks & Recreation'")
+
+
+class TestToCSV:
+
+    def test_round_trip(self, tmp_path):
+        fn = tmp_path / 'employee.csv'
+        df_emp.to_csv(fn, chunksize=100)
+        assert fn.read_bytes() == open('data/employee.csv', 'rb').read()
+
+    def test_missing(self, tmp_path):
+        fn = tmp_path / 'missing.csv'
+        df3.to_csv(fn)
+        assert fn.read_text() == 'a,b,c\na,11,3.4\n,5,nan\nc,8,5.1\n'
+
+    def test_separator_in_value(self, tmp_path):
+        fn = tmp_path / 'separator.csv'
+        for value in ['x,y', 'x\ny']:
+            values = np.array(['ok', value], dtype='O')
+            for a in [values, pdc.StringArray.from_array(values),
+                      pdc.Categorical.from_array(values)]:
+                with pytest.raises(ValueError):
+                    pdc.DataFrame({'a': a}).to_csv(fn)
+
+    def test_long_value(self, tmp_path):
+        fn = tmp_path / 'long.csv'
+        df = pdc.DataFrame({'a': np.arange(20000), 'b': long_strings(['x'])})
+        assert_peak_memory(df.to_csv, fn)
+        assert_df_equals(pdc.read_csv(fn), df)
+
+
+class TestBinary:
+
+    def test_round_trip(self, tmp_path):
+        fn = tmp_path / 'df.pdc'
+        df3.to_binary(fn)
+        for mmap in [True, False]:
+            df_result = pdc.read_binary(fn, mmap=mmap)
+            assert_df_equals(df_result, df3)
+            assert df_result._data['a'][1] is None
+
+    def test_employee(self, tmp_path):
+        fn = tmp_path / 'employee.pdc'
+        df_emp.to_binary(fn)
+        df_result = pdc.read_binary(fn)
+        assert_df_equals(df_result, df_emp)
+        assert not df_result._data['salary'].flags.writeable
+
+    def test_long_string(self, tmp_path):
+        fn = tmp_path / 'long.pdc'
+        df = pdc.DataFrame({'a': np.arange(20000), 'b': long_strings(['x', None])})
+        df.to_binary(fn)
+        for mmap in [True, False]:
+            df_result = assert_peak_memory(pdc.read_binary, fn, mmap)
+            assert_df_equals(df_result, df)
+
+    def test_write_without_copy(self, tmp_path):
+        fn = tmp_path / 'large.pdc'
+        df = pdc.DataFrame({'a': np.arange(2000000, dtype='float')})
+        assert_peak_memory(df.to_binary, fn, limit=2 ** 23)
+        assert_df_equals(pdc.read_binary(fn), df)